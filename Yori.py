@@ -1,5 +1,5 @@
 import pygame, os, random, time
-from rigidbody import RigidBody
+from rigidbody import RigidBody, highest_tile_top
 
 # ── constant paths & sizes ──
 IMG_DIR = os.path.join(os.path.dirname(__file__), 'img')
@@ -21,6 +21,9 @@ DASH_DISTANCE = 250       # How far to dash back (bigger distance)
 ATTACK_DELAY = 0.0        # No delay between individual attacks in combo
 DASH_BACK_DELAY = 1.5     # Delay after dashing back before starting new combo
 
+# AI/combat debug prints (combo steps, counters, hits) – off unless you're debugging
+DEBUG = False
+
 # ── helper to load & scale all frames in a folder ──
 def load_frames(folder):
     path = os.path.join(IMG_DIR, folder)
@@ -47,6 +50,13 @@ class Yori(pygame.sprite.Sprite):
         self.attack1 = load_frames('Yori/Attack 1')
         self.attack2 = load_frames('Yori/Attack 2')
         self.attack3 = load_frames('Yori/Attack 3')
+        # player's counter window per attack: 30%-70% of that animation
+        self._counter_windows = {
+            state: (len(frames) * 0.3, len(frames) * 0.7)
+            for state, frames in (('attack1', self.attack1),
+                                  ('attack2', self.attack2),
+                                  ('attack3', self.attack3))
+        }
         self.dash = load_frames('Yori/Dash')
         self.hurt_counter = load_frames('Yori/Hurt Counter')  # Counter animation
         self.block = load_frames('Yori/Block')  # Block animation
@@ -96,6 +106,7 @@ class Yori(pygame.sprite.Sprite):
         self.skill_duration = 3.0  # Duration of skill animation
         self.skill_damage = 100  # Higher damage for skill attack
         self.should_use_skill = False  # Flag to use skill after dialog
+        self.is_active = False  # main.py switches this on when the player reaches level 5
         
         # Knockback animation system
         self.knockback_start_velocity = 0
@@ -243,16 +254,19 @@ class Yori(pygame.sprite.Sprite):
                        (self.attack_point[1] - player_center[1])**2)**0.5
             
             if distance <= self.attack_radius:
-                print(f"Yori attacks player for {self.attack_damage} damage! Distance: {distance:.1f}")
+                if DEBUG:
+                    print(f"Yori attacks player for {self.attack_damage} damage! Distance: {distance:.1f}")
                 self.target.take_damage(self.attack_damage, self.ui_system)
             else:
-                print(f"Yori attack missed! Player too far away. Distance: {distance:.1f}")
+                if DEBUG:
+                    print(f"Yori attack missed! Player too far away. Distance: {distance:.1f}")
 
     def take_damage(self, damage, ui_system=None):
         """Take damage and show damage text"""
         if self.state == 'counter_wait':
             # Parry successful ��� immediately launch counter attack, ignore damage
-            print("Yori parries the attack and counterattacks!")
+            if DEBUG:
+                print("Yori parries the attack and counterattacks!")
             self.start_counter_attack()
             return
 
@@ -263,12 +277,14 @@ class Yori(pygame.sprite.Sprite):
                 self.state in ['attack1', 'attack2', 'attack3'] and 
                 random.random() < self.counter_attack_chance):
                 # Yori counters the player's attack!
-                print("Yori counters the player's attack!")
+                if DEBUG:
+                    print("Yori counters the player's attack!")
                 self.start_counter_attack()
                 return  # Don't take damage when countering
             
             self.current_health -= damage
-            print(f"Yori took {damage} damage! Health: {self.current_health}/{self.max_health}")
+            if DEBUG:
+                print(f"Yori took {damage} damage! Health: {self.current_health}/{self.max_health}")
             
             # Create damage text if UI system is provided
             if ui_system:
@@ -284,7 +300,8 @@ class Yori(pygame.sprite.Sprite):
                 self.current_health = 0
                 self.state = 'die'
                 self.frame = 0.0
-                self.death_time = time.time()
+                # monotonic clock: main.py's death camera compares against perf_counter()
+                self.death_time = time.perf_counter()
                 
                 # Always face the player when dying
                 if self.target:
@@ -293,7 +310,8 @@ class Yori(pygame.sprite.Sprite):
                     
                     # Signal that a cinematic death is happening
                     self.cinematic_death = True
-                    print("CINEMATIC DEATH ACTIVATED - Camera should focus on Yori now!")
+                    if DEBUG:
+                        print("CINEMATIC DEATH ACTIVATED - Camera should focus on Yori now!")
                     
                 # Start death knockback animation
                 self.is_death_knockback = True
@@ -305,12 +323,14 @@ class Yori(pygame.sprite.Sprite):
                     knockback_dir = -self.dir
                 self.rigid_body.velocity_x = knockback_dir * self.death_knockback_force
                 
-                print("Yori has been defeated with dramatic death knockback!")
+                if DEBUG:
+                    print("Yori has been defeated with dramatic death knockback!")
     
     def stun(self):
         """Stun Yori boss - show hurt counter animation with delay"""
         if self.state != 'die':
-            print("Yori has been countered! Showing hurt counter animation...")
+            if DEBUG:
+                print("Yori has been countered! Showing hurt counter animation...")
             self.in_combo = False
             self.state = 'hurt_counter'
             self.frame = 0.0
@@ -325,7 +345,8 @@ class Yori(pygame.sprite.Sprite):
         """Trigger dialog when Yori's health drops below 55%"""
         self.low_health_dialog_shown = True
         self.can_counter_attack = True  # Enable counter attacks
-        print("Yori's health is below 55%! Triggering low health dialog and enabling advanced AI!")
+        if DEBUG:
+            print("Yori's health is below 55%! Triggering low health dialog and enabling advanced AI!")
         
         # Set a flag that main.py can check to trigger the dialog
         self.should_trigger_low_health_dialog = True
@@ -333,7 +354,8 @@ class Yori(pygame.sprite.Sprite):
     def start_counter_wait(self):
         """Enter counter waiting stance (parry)"""
         if self.state != 'die':
-            print("Yori enters counter stance!")
+            if DEBUG:
+                print("Yori enters counter stance!")
             self.state = 'counter_wait'
             self.frame = 0.0
             self.counter_wait_start_time = time.time()
@@ -344,7 +366,8 @@ class Yori(pygame.sprite.Sprite):
     def start_counter_attack(self):
         """Start Yori's counter attack when health is below 55%"""
         if self.state != 'die':
-            print("Yori performs a counter attack!")
+            if DEBUG:
+                print("Yori performs a counter attack!")
             self.state = 'counter'
             self.frame = 0.0
             self.counter_attack_time = time.time()
@@ -371,7 +394,8 @@ class Yori(pygame.sprite.Sprite):
     def start_skill_attack(self):
         """Start Yori's skill attack when health is below 55%"""
         if self.state != 'die' and self.skill_cooldown <= 0:
-            print("Yori uses his special skill attack!")
+            if DEBUG:
+                print("Yori uses his special skill attack!")
             self.state = 'skill'
             self.frame = 0.0
             self.skill_time = time.time()
@@ -403,7 +427,8 @@ class Yori(pygame.sprite.Sprite):
     def start_block_animation(self):
         """Start the cinematic block animation when counter-attacked"""
         if self.state != 'die':
-            print("Yori blocks the counter attack with cinematic animation!")
+            if DEBUG:
+                print("Yori blocks the counter attack with cinematic animation!")
             self.state = 'block'
             self.frame = 0.0
             self.block_time = time.time()
@@ -453,7 +478,8 @@ class Yori(pygame.sprite.Sprite):
             self.frame = 0.0
             self.is_dashing = True
             self.flip = (self.dir < 0)
-            print("Yori is dashing toward player!")
+            if DEBUG:
+                print("Yori is dashing toward player!")
 
     def ease_in_out(self, t):
         """Smooth easing function for animations"""
@@ -481,7 +507,7 @@ class Yori(pygame.sprite.Sprite):
         now = time.time()
         
         # Check if Yori is active (only in level 5)
-        is_active = hasattr(self, 'is_active') and self.is_active
+        is_active = self.is_active
         
         # Update skill cooldown
         if self.skill_cooldown > 0:
@@ -572,7 +598,8 @@ class Yori(pygame.sprite.Sprite):
                 if (health_percentage < self.low_health_threshold and 
                     self.skill_cooldown <= 0 and 
                     dist <= ATTACK_STOP_DIST):  # Must be near player to hit with skill
-                    print("Yori uses skill attack as priority (health < 55%)")
+                    if DEBUG:
+                        print("Yori uses skill attack as priority (health < 55%)")
                     self.start_skill_attack()
                 elif dist <= ATTACK_STOP_DIST:
                     # Stop walk loop if still playing
@@ -586,12 +613,14 @@ class Yori(pygame.sprite.Sprite):
                         self.sfx_attack[1].play()
                     self.frame = 0.0
                     self.damage_dealt = False
-                    print("Yori starts 3-attack combo!")
+                    if DEBUG:
+                        print("Yori starts 3-attack combo!")
                 else:
                     # Too far – walk towards player
                     self.state = 'walking'
                     self.frame = 0.0
-                    print("Yori walks towards player!")
+                    if DEBUG:
+                        print("Yori walks towards player!")
         
         elif self.state == 'walking':
             # Always face the player when walking
@@ -617,7 +646,8 @@ class Yori(pygame.sprite.Sprite):
                 if self._walk_sound_playing and self.sfx_walk:
                     self.sfx_walk.stop()
                     self._walk_sound_playing = False
-                print("Yori stops walking to use skill attack (health < 55%)")
+                if DEBUG:
+                    print("Yori stops walking to use skill attack (health < 55%)")
                 self.start_skill_attack()
             elif dist <= ATTACK_STOP_DIST:
                 # Close enough - start attack combo
@@ -635,7 +665,8 @@ class Yori(pygame.sprite.Sprite):
                     self.sfx_attack[1].play()
                 self.frame = 0.0
                 self.damage_dealt = False
-                print("Yori reached player - starting attack combo!")
+                if DEBUG:
+                    print("Yori reached player - starting attack combo!")
         
         elif self.state == 'attack1':
             # Stop moving during attack
@@ -649,7 +680,8 @@ class Yori(pygame.sprite.Sprite):
             
             # Check if player moved too far away - reset combo
             if dist > ATTACK_STOP_DIST:
-                print("Player moved away - resetting Yori combo!")
+                if DEBUG:
+                    print("Player moved away - resetting Yori combo!")
                 self.in_combo = False
                 self.state = 'idle'
                 self.frame = 0.0
@@ -676,7 +708,8 @@ class Yori(pygame.sprite.Sprite):
                     self.frame = 0.0
                     self.damage_dealt = False
                     self.in_combo = False  # Reset combo after repositioning
-                    print("Player behind Yori! Repositioning...")
+                    if DEBUG:
+                        print("Player behind Yori! Repositioning...")
                 else:
                     # Continue with normal combo
                     self.attack_combo_count = 1
@@ -686,7 +719,8 @@ class Yori(pygame.sprite.Sprite):
                     self.frame = 0.0
                     self.damage_dealt = False
                     self.next_action_time = now + ATTACK_DELAY
-                    print("Yori combo: Attack 1 → Attack 2")
+                    if DEBUG:
+                        print("Yori combo: Attack 1 → Attack 2")
         
         elif self.state == 'attack2':
             # Stop moving during attack
@@ -699,7 +733,8 @@ class Yori(pygame.sprite.Sprite):
             
             # Check if player moved too far away - reset combo
             if dist > ATTACK_STOP_DIST:
-                print("Player moved away - resetting Yori combo!")
+                if DEBUG:
+                    print("Player moved away - resetting Yori combo!")
                 self.in_combo = False
                 self.state = 'idle'
                 self.frame = 0.0
@@ -731,7 +766,8 @@ class Yori(pygame.sprite.Sprite):
                     self.frame = 0.0
                     self.damage_dealt = False
                     self.in_combo = False  # Reset combo after repositioning
-                    print("Player behind Yori! Repositioning...")
+                    if DEBUG:
+                        print("Player behind Yori! Repositioning...")
                 else:
                     # Continue with normal combo
                     self.attack_combo_count = 2
@@ -741,7 +777,8 @@ class Yori(pygame.sprite.Sprite):
                     self.frame = 0.0
                     self.damage_dealt = False
                     self.next_action_time = now + ATTACK_DELAY
-                    print("Yori combo: Attack 2 → Attack 3")
+                    if DEBUG:
+                        print("Yori combo: Attack 2 → Attack 3")
         
         elif self.state == 'attack3':
             # Stop moving during attack
@@ -754,7 +791,8 @@ class Yori(pygame.sprite.Sprite):
             
             # Check if player moved too far away - reset combo
             if dist > ATTACK_STOP_DIST:
-                print("Player moved away - resetting Yori combo!")
+                if DEBUG:
+                    print("Player moved away - resetting Yori combo!")
                 self.in_combo = False
                 self.state = 'idle'
                 self.frame = 0.0
@@ -786,12 +824,14 @@ class Yori(pygame.sprite.Sprite):
                     self.frame = 0.0
                     self.damage_dealt = False
                     self.in_combo = False  # Reset combo after repositioning
-                    print("Player behind Yori! Repositioning...")
+                    if DEBUG:
+                        print("Player behind Yori! Repositioning...")
                 else:
                     # Combo finished normally - dash back
                     self.in_combo = False
                     self.start_dash_back()
-                    print("Yori combo finished - dashing back!")
+                    if DEBUG:
+                        print("Yori combo finished - dashing back!")
         
         elif self.state == 'dash':
             # Play dash animation
@@ -823,12 +863,14 @@ class Yori(pygame.sprite.Sprite):
                         self.state = 'attack1'
                         self.frame = 0.0
                         self.damage_dealt = False
-                        print("Yori finished dash - starting new combo immediately!")
+                        if DEBUG:
+                            print("Yori finished dash - starting new combo immediately!")
                     else:
                         # Too far - start walking immediately
                         self.state = 'walking'
                         self.frame = 0.0
-                        print("Yori finished dash - walking to player immediately!")
+                        if DEBUG:
+                            print("Yori finished dash - walking to player immediately!")
         
         elif self.state == 'counter_wait':
             # Hold parry stance
@@ -845,7 +887,8 @@ class Yori(pygame.sprite.Sprite):
             self.rect = img.get_rect(midbottom=self.rect.midbottom)
             # If player hasn't attacked in time, resume combat
             if now >= self.counter_wait_start_time + self.counter_wait_duration:
-                print("Counter window expired - Yori resumes attack!")
+                if DEBUG:
+                    print("Counter window expired - Yori resumes attack!")
                 self.state = 'idle'
                 self.frame = 0.0
                 self.next_action_time = now + 0.5
@@ -859,11 +902,13 @@ class Yori(pygame.sprite.Sprite):
             
             # Check if counter delay has passed
             if now >= self.hurt_counter_time + self.counter_delay:
-                print("Hurt counter delay finished - player can now counter attack!")
+                if DEBUG:
+                    print("Hurt counter delay finished - player can now counter attack!")
                 # Stay in hurt_counter state until player attacks or timeout
                 if now >= self.next_action_time:
                     # Timeout - return to idle
-                    print("Counter window expired - Yori returns to combat!")
+                    if DEBUG:
+                        print("Counter window expired - Yori returns to combat!")
                     self.state = 'idle'
                     self.frame = 0.0
                     self.next_action_time = now + 0.5
@@ -888,7 +933,8 @@ class Yori(pygame.sprite.Sprite):
             
             # Check if block animation should end
             if now >= self.block_time + self.block_duration:
-                print("Block animation finished - Yori returns to combat!")
+                if DEBUG:
+                    print("Block animation finished - Yori returns to combat!")
                 self.is_in_knockback = False
                 self.rigid_body.velocity_x = 0
                 
@@ -901,13 +947,15 @@ class Yori(pygame.sprite.Sprite):
                     self.frame = 0.0
                     self.damage_dealt = False
                     self.next_action_time = now  # No delay
-                    print("Block finished - Yori immediately starts attacking!")
+                    if DEBUG:
+                        print("Block finished - Yori immediately starts attacking!")
                 else:
                     # Too far - start walking immediately
                     self.state = 'walking'
                     self.frame = 0.0
                     self.next_action_time = now  # No delay
-                    print("Block finished - Yori immediately starts walking to player!")
+                    if DEBUG:
+                        print("Block finished - Yori immediately starts walking to player!")
         
         elif self.state == 'counter':
             # Stop all movement during counter attack
@@ -945,7 +993,8 @@ class Yori(pygame.sprite.Sprite):
             if (not self.damage_dealt) and self.frame >= len(self.counter) * 0.6:
                 self.attack_player()
                 self.damage_dealt = True
-                print("Yori's counter attack hits!")
+                if DEBUG:
+                    print("Yori's counter attack hits!")
                 # Apply knockback to player
                 if self.target and hasattr(self.target, 'rigid_body'):
                     knock_dir = 1 if self.target.rect.centerx > self.rect.centerx else -1
@@ -975,7 +1024,8 @@ class Yori(pygame.sprite.Sprite):
 
             # Finish when animation ends – immediately resume combat (no long delay)
             if self.frame >= len(self.counter) - 1:
-                print("Counter attack finished - Yori returns to combat!")
+                if DEBUG:
+                    print("Counter attack finished - Yori returns to combat!")
                 # Return to appropriate state based on distance
                 if dist <= ATTACK_STOP_DIST:
                     self.state = 'idle'
@@ -1015,11 +1065,13 @@ class Yori(pygame.sprite.Sprite):
                 self.attack_damage = original_damage
                 self.attack_radius = original_radius
                 self.damage_dealt = True
-                print("Yori's skill attack hits with devastating power!")
+                if DEBUG:
+                    print("Yori's skill attack hits with devastating power!")
             
             # Check if skill animation finished
             if now >= self.skill_time + self.skill_duration:
-                print("Skill attack finished - Yori returns to combat!")
+                if DEBUG:
+                    print("Skill attack finished - Yori returns to combat!")
                 # Return to appropriate state based on distance
                 if dist <= ATTACK_STOP_DIST:
                     self.state = 'idle'
@@ -1032,7 +1084,7 @@ class Yori(pygame.sprite.Sprite):
             # Handle death knockback animation
             if self.is_death_knockback:
                 # Calculate death knockback progress (0 to 1)
-                death_progress = (now - self.death_time) / self.death_knockback_duration
+                death_progress = (time.perf_counter() - self.death_time) / self.death_knockback_duration
                 
                 if death_progress >= 1.0:
                     # Death knockback finished
@@ -1047,7 +1099,7 @@ class Yori(pygame.sprite.Sprite):
             # Play death animation (don't loop it) with slow-motion effect
             if self.death:
                 # Calculate how much time has passed since death
-                current_time = time.time()
+                current_time = time.perf_counter()
                 time_since_death = current_time - self.death_time
                 
                 # Super slow animation progression - map all frames to 6 seconds duration
@@ -1104,8 +1156,8 @@ class Yori(pygame.sprite.Sprite):
             health_rect = pygame.Rect(bar_x, bar_y, bar_width, bar_height)
             pygame.draw.rect(screen, (60, 0, 0), health_rect)  # Very dark red for death
             
-    def check_tile_collision_below(self, tile_rects):
-        """Check if there's a solid tile below Yori for ground detection"""
+    def ground_probes(self):
+        """The (narrow, wide) rects checked for ground below Yori's feet"""
         # Create a wider rectangle below Yori's feet - much wider to prevent falling at level transitions
         check_rect = pygame.Rect(
             self.rect.centerx - 60,  # Much wider rectangle centered on Yori
@@ -1113,29 +1165,27 @@ class Yori(pygame.sprite.Sprite):
             120,                     # Extra wide to handle level transitions
             32                       # Check for ground up to 32px below (half tile)
         )
+        # Even wider check for level transitions (used when the narrow one finds nothing)
+        transition_check_rect = pygame.Rect(
+            self.rect.centerx - 150,  # Very wide check for better level transitions
+            self.rect.bottom,         # Start at Yori's feet
+            300,                      # Extra wide to ensure level transitions work
+            64                        # Check a full tile height down
+        )
+        return check_rect, transition_check_rect
+
+    def check_tile_collision_below(self, tile_rects):
+        """Check if there's a solid tile below Yori for ground detection"""
+        check_rect, transition_check_rect = self.ground_probes()
         
-        # Check collision with any tile
-        found_ground = None
-        for tile_rect in tile_rects:
-            if check_rect.colliderect(tile_rect):
-                # If we find multiple ground tiles, use the highest one
-                if found_ground is None or tile_rect.top < found_ground:
-                    found_ground = tile_rect.top
+        # Check collision with any tile (if we find multiple ground tiles, use the highest one)
+        found_ground = highest_tile_top(check_rect, tile_rects)
         
         # If no ground found with initial check, try an even wider check for level transitions
         if found_ground is None and len(tile_rects) > 0:
-            transition_check_rect = pygame.Rect(
-                self.rect.centerx - 150,  # Very wide check for better level transitions
-                self.rect.bottom,         # Start at Yori's feet
-                300,                      # Extra wide to ensure level transitions work
-                64                        # Check a full tile height down
-            )
             
-            for tile_rect in tile_rects:
-                if transition_check_rect.colliderect(tile_rect):
-                    # Use the highest ground found
-                    if found_ground is None or tile_rect.top < found_ground:
-                        found_ground = tile_rect.top
+            # Use the highest ground found
+            found_ground = highest_tile_top(transition_check_rect, tile_rects)
         
         # Store previous ground for reference
         if not hasattr(self, '_prev_found_ground'):
@@ -1143,4 +1193,10 @@ class Yori(pygame.sprite.Sprite):
         self._prev_found_ground = found_ground
         
         # Return the highest ground found or None
-        return found_ground
\ No newline at end of file
+        return found_ground
+
+    def resolve_tiles_and_ground(self, tile_rects):
+        """rigid_body.check_tile_collision + check_tile_collision_below in one pass"""
+        found_ground = self.rigid_body.resolve_and_ground(tile_rects, *self.ground_probes())
+        self._prev_found_ground = found_ground
+        return found_ground
@@ -17,25 +17,39 @@ class DialogSystem:
         self.skip_surface = self.font.render("[SKIP]", True, (255, 255, 255))
         self.skip_rect = self.skip_surface.get_rect()
         self.skip_rect.bottomright = (self.screen_w - 20, self.screen_h - 20)
+        # path / source Surface → portrait already scaled for this screen
+        # (scaled portraits map to themselves so they can be passed straight back in)
+        self._portraits = {}
+
+    def load_portrait(self, img):
+        """Return the scaled portrait for a path or Surface, loading/scaling it only once."""
+        if img is None:
+            return None
+        cached = self._portraits.get(img)
+        if cached is not None or img in self._portraits:
+            return cached
+        if isinstance(img, str):
+            if os.path.isfile(img):
+                img_surf = pygame.image.load(img).convert_alpha()
+            else:
+                img_surf = None
+        else:
+            img_surf = img
+        if img_surf:
+            # scale portrait height to ~70% of screen
+            scale_h = int(self.screen_h * 0.7)
+            scale_factor = scale_h / img_surf.get_height()
+            scale_w = int(img_surf.get_width() * scale_factor)
+            img_surf = pygame.transform.smoothscale(img_surf, (scale_w, scale_h))
+            self._portraits[img_surf] = img_surf
+        self._portraits[img] = img_surf
+        return img_surf
 
     def start(self, dialogs):
         """Start a dialog sequence (list of dicts). Freezes game until finished."""
         self.dialogs = []
         for d in dialogs:
-            img = d.get("image")
-            if isinstance(img, str):
-                if os.path.isfile(img):
-                    img_surf = pygame.image.load(img).convert_alpha()
-                else:
-                    img_surf = None
-            else:
-                img_surf = img
-            if img_surf:
-                # scale portrait height to ~70% of screen
-                scale_h = int(self.screen_h * 0.7)
-                scale_factor = scale_h / img_surf.get_height()
-                scale_w = int(img_surf.get_width() * scale_factor)
-                img_surf = pygame.transform.smoothscale(img_surf, (scale_w, scale_h))
+            img_surf = self.load_portrait(d.get("image"))
             self.dialogs.append({"image": img_surf, "text": d.get("text", "")})
         self.index = 0
         self.active = True
@@ -1,5 +1,5 @@
-import pygame, os, random, time
-from rigidbody import RigidBody
+import pygame, os, random, time, math
+from rigidbody import RigidBody, highest_tile_top
 
 # ── constant paths & sizes ──
 IMG_DIR      = os.path.join(os.path.dirname(__file__), 'img')
@@ -14,20 +14,83 @@ DETECT_RANGE     = 500        # if player is within 800 px, enemy spots them
 ATTACK_STOP_DIST = 130        # stop approaching when within 130 px of player
 RECOVER_MIN_SEC  = 2          # back-off pause at least 2 seconds after attack
 RECOVER_MAX_SEC  = 3          # at most 3 seconds back-off
+# animation frame counter is fixed point in tenths of a frame, index = fx // 10
+# (decimal so 0.2 / 0.3 frames per update are exact – binary fractions would
+#  truncate them and stretch every animation)
+FRAME_FX_ONE       = 10
+ANIM_SPEED_FX      = 2   # 0.2 frames per update
+ANIM_SPEED_FAST_FX = 3   # 0.3 frames per update
+IDLE_SPAN        = IDLE_MAX_SEC - IDLE_MIN_SEC
+RECOVER_SPAN     = RECOVER_MAX_SEC - RECOVER_MIN_SEC
+
+# Combat debug prints (attacks, damage, stuns) – off unless you're debugging
+DEBUG = False
+
+# bound once so the state machine skips the uniform() wrapper + module lookups
+_random = random.random
+_choice = random.choice
+_DIRS   = (-1, 1)
+
+# state groups checked every frame (states stay interned strings because
+# player.py / main.py set and compare them directly, same as on Yori)
+_NO_DAMAGE_STATES = frozenset(('hurt', 'die', 'stun'))
+_PATROL_STATES    = frozenset(('idle', 'walk'))
+_MOVING_STATES    = frozenset(('walk', 'approach', 'recover'))
 
 # ── helper to load & scale all frames in a folder ──
+# frames are shared by every enemy, so each folder is only read/scaled once
+_FRAME_CACHE = {}
+# frame -> its left-facing twin, so animate() never flips at runtime
+_FLIPPED = {}
+
+def _frame_sort_key(name):
+    stem = name.partition('.')[0]
+    # numbered frames first in numeric order, anything else after by name
+    return (0, int(stem), name) if stem.isdigit() else (1, 0, name)
+
 def load_frames(folder):
-    path = os.path.join(IMG_DIR, folder)
-    files = sorted(os.listdir(path), key=lambda x: int(x.split('.')[0]))
-    return [
-        pygame.transform.scale(
-            pygame.image.load(os.path.join(path, f)).convert_alpha(),
-            ENEMY_SIZE
-        )
-        for f in files
-    ]
+    """
+    Frames of one folder, scaled to ENEMY_SIZE and packed into a single atlas
+    surface; the list holds subsurface views into it (one pixel buffer per
+    animation, same as the player's). The atlas is mirrored once for _FLIPPED.
+    """
+    frames = _FRAME_CACHE.get(folder)
+    if frames is None:
+        path = os.path.join(IMG_DIR, folder)
+        files = sorted(os.listdir(path), key=_frame_sort_key)
+        w, h = ENEMY_SIZE
+        # cols × rows == frame count exactly, so there are no empty cells
+        n = max(1, len(files))
+        cols = next(c for c in range(math.isqrt(n), 0, -1) if n % c == 0)
+        atlas = pygame.Surface((w * cols, h * (n // cols)), pygame.SRCALPHA).convert_alpha()
+        atlas.fill((0, 0, 0, 0))
+        frames = []
+        for i, f in enumerate(files):
+            cell = pygame.Rect((i % cols) * w, (i // cols) * h, w, h)
+            atlas.blit(pygame.transform.scale(
+                pygame.image.load(os.path.join(path, f)).convert_alpha(), ENEMY_SIZE), cell)
+            frames.append(atlas.subsurface(cell))
+        flipped = pygame.transform.flip(atlas, True, False)
+        aw = atlas.get_width()
+        for frame in frames:
+            x, y = frame.get_offset()
+            _FLIPPED[frame] = flipped.subsurface((aw - x - w, y, w, h))
+        _FRAME_CACHE[folder] = frames
+    return frames
+
+# every animation folder an enemy uses
+ENEMY_FOLDERS = (
+    'Enemy 1/Idle', 'Enemy 1/Walking', 'Enemy 1/Attack',
+    'Enemy 1/Hurt', 'Enemy 1/Death', 'Enemy 1/Stun',
+)
 
 class Enemy(pygame.sprite.Sprite):
+    @classmethod
+    def preload(cls):
+        """Decode + scale every enemy frame up front (needs the display to exist)"""
+        for folder in ENEMY_FOLDERS:
+            load_frames(folder)
+
     def __init__(self, pos):
         super().__init__()
         # load animations: idle, walk, attack
@@ -40,14 +103,18 @@ class Enemy(pygame.sprite.Sprite):
 
         # initial animation state
         self.state = 'idle'
-        self.frame = 0.0
+        self.frame_fx = 0
+        # cleared by main.py while the player is in a different level (enemy goes dormant)
+        self.is_active = True
+        # level main.py has this enemy bucketed under (enemies_by_level)
+        self.level_idx = None
 
         # health attributes
         self.max_health = 100
         self.current_health = self.max_health
 
         # choose random initial patrol direction
-        self.dir  = random.choice([-1, 1])   # -1 = left, +1 = right
+        self.dir  = _choice(_DIRS)   # -1 = left, +1 = right
         self.flip = (self.dir < 0)           # flip image if facing left
 
         # set starting image & position
@@ -56,7 +123,7 @@ class Enemy(pygame.sprite.Sprite):
         # e.g. if pos=(426,670), rect.midbottom=(426,670)
 
         # timers & trackers for idle/patrol
-        self.next_idle   = time.time() + random.uniform(IDLE_MIN_SEC, IDLE_MAX_SEC)
+        self.next_idle   = time.time() + IDLE_MIN_SEC + IDLE_SPAN * _random()
         # e.g. now=1000.0 → next_idle=1000+3.5=1003.5
         self.patrol_dist = 0     # how far we've patrolled so far
         self.patrol_tgt  = 0     # how far we want to patrol this cycle
@@ -74,12 +141,24 @@ class Enemy(pygame.sprite.Sprite):
         self.attack_damage = 50
         
         # attack point attributes (similar to player)
-        self.attack_point = (self.rect.centerx, self.rect.centery)
+        self.attack_point_x = self.rect.centerx
+        self.attack_point_y = self.rect.centery
         self.attack_radius = 80  # Enemy has larger attack radius
 
         # attack timing control
         self.damage_dealt = False  # Track if damage was dealt in current attack
         self.damage_frame = 0.7  # Deal damage when animation is 70% complete
+        # frame counts never change after loading, so work the thresholds out once
+        # (kept in the same fixed-point units as frame_fx)
+        self.attack_len       = len(self.attack)
+        # first frame_fx at or past the damage point (epsilon guards float noise)
+        self.attack_damage_fx = math.ceil(self.attack_len * self.damage_frame * FRAME_FX_ONE - 1e-9)
+        self.attack_last_fx   = (self.attack_len - 1) * FRAME_FX_ONE
+        self.hurt_last_fx     = (len(self.hurt) - 1) * FRAME_FX_ONE
+        # player's counter window: 30%-70% of the attack animation
+        self._counter_lo      = self.attack_len * 0.3
+        self._counter_hi      = self.attack_len * 0.7
+        self.die_last_fx      = (len(self.die) - 1) * FRAME_FX_ONE
         # Add a property to help with debugging
                 
         # stun system
@@ -116,32 +195,38 @@ class Enemy(pygame.sprite.Sprite):
             # Position attack point in front of enemy based on facing direction
             offset_x = 120 if self.dir == 1 else -120  # Adjust distance as needed
             offset_y = -10  # Slightly above center
-            self.attack_point = (self.rect.centerx + offset_x, self.rect.centery + offset_y)
+            self.attack_point_x = self.rect.centerx + offset_x
+            self.attack_point_y = self.rect.centery + offset_y
         else:
             # Default position when not attacking
-            self.attack_point = (self.rect.centerx, self.rect.centery)
+            self.attack_point_x = self.rect.centerx
+            self.attack_point_y = self.rect.centery
 
     def attack_player(self, ui_system=None):
         if self.target:
-            print(f"Enemy attacks player for {self.attack_damage} damage!")
+            if DEBUG:
+                print(f"Enemy attacks player for {self.attack_damage} damage!")
             # Calculate distance between enemy attack point and player center
-            player_center = (self.target.rect.centerx, self.target.rect.centery)
-            distance = ((self.attack_point[0] - player_center[0])**2 + 
-                       (self.attack_point[1] - player_center[1])**2)**0.5
+            dx = self.attack_point_x - self.target.rect.centerx
+            dy = self.attack_point_y - self.target.rect.centery
+            distance = (dx * dx + dy * dy) ** 0.5
             
             # Only deal damage if player is within attack radius
             if distance <= self.attack_radius:
-                print(f"Enemy attacks player for {self.attack_damage} damage! Distance: {distance:.1f}")
+                if DEBUG:
+                    print(f"Enemy attacks player for {self.attack_damage} damage! Distance: {distance:.1f}")
                 self.target.take_damage(self.attack_damage, ui_system)
             else:
-                print(f"Enemy attack missed! Player too far away. Distance: {distance:.1f}")
+                if DEBUG:
+                    print(f"Enemy attack missed! Player too far away. Distance: {distance:.1f}")
             
 
 
     def take_damage(self, damage, ui_system=None):
-        if self.state not in ('hurt', 'die', 'stun', 'stun'):
+        if self.state not in _NO_DAMAGE_STATES:
             self.current_health -= damage
-            print(f"Enemy took {damage} damage! Health: {self.current_health}/{self.max_health}")
+            if DEBUG:
+                print(f"Enemy took {damage} damage! Health: {self.current_health}/{self.max_health}")
             
             # Create damage text if UI system is provided
             if ui_system:
@@ -149,18 +234,19 @@ class Enemy(pygame.sprite.Sprite):
             
             if self.current_health <= 0:
                 self.state = 'die'
-                self.frame = 0.0
+                self.frame_fx = 0
             else:
                 self.state = 'hurt'
-                self.frame = 0.0
+                self.frame_fx = 0
     
     def stun(self):
         """Stun the enemy for 1 second"""
-        if self.state not in ('die',):  # Can't stun if dead
-            print("Enemy stunned!")
+        if self.state != 'die':  # Can't stun if dead
+            if DEBUG:
+                print("Enemy stunned!")
             self.stunned = True
             self.state = 'stun'
-            self.frame = 0.0
+            self.frame_fx = 0
             self.stun_end_time = time.time() + 1.0  # Stun for 1 second
             
             # Stop all movement
@@ -169,23 +255,39 @@ class Enemy(pygame.sprite.Sprite):
             # Reset damage dealt flag to prevent damage during stun
             self.damage_dealt = True
 
-    def animate(self, seq, speed=0.2):
+    @property
+    def frame(self):
+        # float view for outside code (player counter window, main.py resets)
+        return self.frame_fx / FRAME_FX_ONE
+
+    @frame.setter
+    def frame(self, value):
+        self.frame_fx = int(value * FRAME_FX_ONE)
+
+    def animate(self, seq, speed_fx=ANIM_SPEED_FX):
         """
-        Advance through the given animation sequence `seq` at `speed` frames per update.
+        Advance through the given animation sequence `seq` by `speed_fx`
+        (fixed point, FRAME_FX_ONE == one frame) per update.
         """
-        self.frame = (self.frame + speed) % len(seq)
-        img = seq[int(self.frame)]
+        self.frame_fx = (self.frame_fx + speed_fx) % (len(seq) * FRAME_FX_ONE)
+        img = seq[self.frame_fx // FRAME_FX_ONE]
         if self.flip:
-            img = pygame.transform.flip(img, True, False)
+            img = _FLIPPED[img]   # pre-flipped at load
         # update image & keep bottom alignment
         self.image = img
         self.rect  = img.get_rect(midbottom=self.rect.midbottom)
 
-    def update(self):
-        now = time.time()
+    def update(self, now=None):
+        # dormant enemies (not in the player's level) skip AI, physics and animation
+        if not self.is_active:
+            return
+        # the caller can hand in one shared timestamp for every enemy this frame
+        if now is None:
+            now = time.time()
         
         # ── PHYSICS UPDATE ──
-        # Update physics simulation first
+        # Update physics simulation first (update_physics returns straight away
+        # for a body at rest)
         self.rigid_body.update_physics(dt=1.0)
         
         # Check ground collision with rigid body only if ground_y is set
@@ -210,24 +312,25 @@ class Enemy(pygame.sprite.Sprite):
         self.update_attack_point()
 
         if self.state == 'hurt':
-            self.animate(self.hurt, speed=0.3)
-            if self.frame >= len(self.hurt) - 1:
+            self.animate(self.hurt, speed_fx=ANIM_SPEED_FAST_FX)
+            if self.frame_fx >= self.hurt_last_fx:
                 self.state = 'idle'
-                self.frame = 0.0
+                self.frame_fx = 0
             return
         
         if self.state == 'stun':
             # Play stun animation and check if stun time is over
-            self.animate(self.stun_frames, speed=0.2)
+            self.animate(self.stun_frames, speed_fx=ANIM_SPEED_FX)
             
             # Update stun timer
             self.stun_timer -= 1/60.0  # Assuming 60 FPS
             
             # Check if stun is over
             if self.stun_timer <= 0:
-                print("Enemy stun ended")
+                if DEBUG:
+                    print("Enemy stun ended")
                 self.state = 'idle'
-                self.frame = 0.0
+                self.frame_fx = 0
                 self.damage_dealt = False  # Reset damage dealt flag
             
             # No movement during stun
@@ -235,29 +338,29 @@ class Enemy(pygame.sprite.Sprite):
             return
 
         if self.state == 'die':
-            self.animate(self.die, speed=0.3)
-            if self.frame >= len(self.die) - 1:
+            self.animate(self.die, speed_fx=ANIM_SPEED_FAST_FX)
+            if self.frame_fx >= self.die_last_fx:
                 self.kill()  # Remove the enemy from the game
             return
         elif self.state == 'attack':
             # Stop moving during attack
             self.rigid_body.velocity_x = 0
             # play attack animation once
-            self.animate(self.attack, speed=0.3)
+            self.animate(self.attack, speed_fx=ANIM_SPEED_FAST_FX)
 
             # Deal damage when animation reaches the damage frame
-            if not self.damage_dealt and self.frame >= len(self.attack) * self.damage_frame:
+            if not self.damage_dealt and self.frame_fx >= self.attack_damage_fx:
                                 
                 self.attack_player(self.ui_system)
                 self.damage_dealt = True
 
             # when last frame reached:
-            if self.frame >= len(self.attack) - 1:
+            if self.frame_fx >= self.attack_last_fx:
                 # self.attack_player()  # Attack the player
                 # start recovery/back-off
                 self.state = 'recover'
-                self.frame = 0.0
-                self.recover_end = now + random.uniform(RECOVER_MIN_SEC, RECOVER_MAX_SEC)
+                self.frame_fx = 0
+                self.recover_end = now + RECOVER_MIN_SEC + RECOVER_SPAN * _random()
                 # reverse direction to back away
                 self.dir = -self.dir
                 self.damage_dealt = False  # Reset for next attack
@@ -267,95 +370,108 @@ class Enemy(pygame.sprite.Sprite):
 
 
         # calculate horizontal distance to player (if set), else a large number
-        if self.target:
-            dist = abs(self.target.rect.centerx - self.rect.centerx)
+        # (the offset is read once; every "face the player" below reuses it)
+        target = self.target
+        if target:
+            dx   = target.rect.centerx - self.rect.centerx
+            dist = abs(dx)
             # e.g. player at x=640, enemy at 426 → dist=214 px
         else:
+            dx   = 0
             dist = 1e6
+        face_dir = 1 if dx > 0 else -1
+        rb = self.rigid_body
 
         # ── 1) Detection: if idle/walking and player is close, start approach ──
-        if self.state in ('idle','walk') and dist < DETECT_RANGE:
+        if self.state in _PATROL_STATES and dist < DETECT_RANGE:
             self.state = 'approach'
-            self.frame = 0.0
+            self.frame_fx = 0
             # face the player
-            self.dir  = 1 if self.target.rect.centerx > self.rect.centerx else -1
+            self.dir  = face_dir
             self.flip = (self.dir < 0)
 
         # ── 2) State machine ──
         if self.state == 'idle':
             # Stop moving when idle
-            self.rigid_body.velocity_x *= 0.8  # Apply friction to slow down
+            rb.velocity_x *= 0.8  # Apply friction to slow down
             # wait until `next_idle` time, then pick a patrol
             if now >= self.next_idle:
                 self.state       = 'walk'
-                self.frame       = 0.0
+                self.frame_fx    = 0
                 self.patrol_dist = 0
                 self.patrol_tgt  = WALK_DIST  # e.g. 100 px
                 # choose random patrol direction
-                self.dir   = random.choice([-1, 1])
+                self.dir   = _choice(_DIRS)
                 self.flip  = (self.dir < 0)
 
         elif self.state == 'walk':
             # patrol in one direction using physics
             # Set velocity directly instead of applying force for more predictable movement
-            self.rigid_body.velocity_x = self.dir * WALK_SPEED
-            self.patrol_dist += abs(WALK_SPEED)  # Track distance moved
+            rb.velocity_x = self.dir * WALK_SPEED
+            self.patrol_dist += WALK_SPEED  # Track distance moved
             # if we've walked far enough, go back to idle
             if self.patrol_dist >= self.patrol_tgt:
                 self.state     = 'idle'
-                self.frame     = 0.0
+                self.frame_fx  = 0
                 # schedule next idle duration
-                self.next_idle = now + random.uniform(IDLE_MIN_SEC, IDLE_MAX_SEC)
+                self.next_idle = now + IDLE_MIN_SEC + IDLE_SPAN * _random()
 
         elif self.state == 'approach':
             # move toward player until within ATTACK_STOP_DIST using physics
             if dist > ATTACK_STOP_DIST:
                 # Set velocity directly for more predictable movement
-                self.rigid_body.velocity_x = self.dir * WALK_SPEED
+                rb.velocity_x = self.dir * WALK_SPEED
             else:
                 # Stop moving when close enough to attack
-                self.rigid_body.velocity_x = 0
+                rb.velocity_x = 0
                 # close enough to attack:
-                self.dir   = 1 if self.target.rect.centerx > self.rect.centerx else -1
+                self.dir   = face_dir
                 self.flip  = (self.dir < 0)
                 self.state = 'attack'
-                self.frame = 0.0
+                self.frame_fx = 0
 
         
         elif self.state == 'recover':
             # move backwards using physics
             # Set velocity directly for more predictable movement
-            self.rigid_body.velocity_x = self.dir * WALK_SPEED
+            rb.velocity_x = self.dir * WALK_SPEED
             # once back-off time is up:
             if now >= self.recover_end:
                 if dist < DETECT_RANGE:
                     # if player still close, re-approach
                     self.state = 'approach'
-                    self.frame = 0.0
-                    self.dir   = 1 if self.target.rect.centerx > self.rect.centerx else -1
+                    self.frame_fx = 0
+                    self.dir   = face_dir
                     self.flip  = (self.dir < 0)
                 else:
                     # otherwise go idle/patrol again
                     self.state     = 'idle'
-                    self.frame     = 0.0
-                    self.next_idle = now + random.uniform(IDLE_MIN_SEC, IDLE_MAX_SEC)
+                    self.frame_fx  = 0
+                    self.next_idle = now + IDLE_MIN_SEC + IDLE_SPAN * _random()
 
         # ── 3) default animation for idle/walk/approach/recover ──
         if self.state == 'idle':
             self.animate(self.idle)
-        elif self.state in ('walk', 'approach', 'recover'):
+        elif self.state in _MOVING_STATES:
             self.animate(self.walk)
 
 
 
 
 
+    @classmethod
+    def draw_all(cls, screen, sprites, cam_x, cam_y):
+        """Blit a whole batch of sprites in one Surface.blits() call (draw order kept)"""
+        screen.blits([(spr.image, (spr.rect.x - cam_x, spr.rect.y - cam_y)) for spr in sprites],
+                     doreturn=False)
+
     def draw_attack_point(self, screen, cam_x, cam_y):
         # Use the dynamic attack point position and radius
         # Adjust the attack point position by the camera offset
-        adjusted_attack_point = (self.attack_point[0] - cam_x, self.attack_point[1] - cam_y)
         # Draw the attack point as a circle (blue for enemy, red for player)
-        pygame.draw.circle(screen, (0, 0, 255), adjusted_attack_point, self.attack_radius, 2)
+        pygame.draw.circle(screen, (0, 0, 255),
+                           (self.attack_point_x - cam_x, self.attack_point_y - cam_y),
+                           self.attack_radius, 2)
     
     def draw_rigid_body_debug(self, screen, cam_x, cam_y, color=(255, 0, 0), show_velocity=False):
         """Draw the enemy's rigid body collider for debugging"""
@@ -363,8 +479,8 @@ class Enemy(pygame.sprite.Sprite):
             # Draw with specified color (default red to distinguish from player)
             self.rigid_body.draw_debug(screen, cam_x, cam_y, color=color, width=2, show_velocity=show_velocity)
             
-    def check_tile_collision_below(self, tile_rects):
-        """Check if there's a solid tile below the enemy for ground detection"""
+    def ground_probes(self):
+        """The (narrow, wide) rects checked for ground below the enemy's feet"""
         # Create a wider rectangle below the enemy's feet - much wider to prevent falling at level transitions
         # Start 1 pixel above feet so ground tile that aligns exactly with bottom is detected
         check_rect = pygame.Rect(
@@ -373,29 +489,27 @@ class Enemy(pygame.sprite.Sprite):
             100,
             33
         )
+        # Even wider check for level transitions (used when the narrow one finds nothing)
+        transition_check_rect = pygame.Rect(
+            self.rect.centerx - 150,  # Very wide check for better level transitions
+            self.rect.bottom,         # Start at enemy's feet
+            300,                      # Extra wide to ensure level transitions work
+            64                        # Check a full tile height down
+        )
+        return check_rect, transition_check_rect
+
+    def check_tile_collision_below(self, tile_rects):
+        """Check if there's a solid tile below the enemy for ground detection"""
+        check_rect, transition_check_rect = self.ground_probes()
         
-        # Check collision with any tile
-        found_ground = None
-        for tile_rect in tile_rects:
-            if check_rect.colliderect(tile_rect):
-                # If we find multiple ground tiles, use the highest one
-                if found_ground is None or tile_rect.top < found_ground:
-                    found_ground = tile_rect.top
+        # Check collision with any tile (if we find multiple ground tiles, use the highest one)
+        found_ground = highest_tile_top(check_rect, tile_rects)
         
         # If no ground found with initial check, try an even wider check for level transitions
         if found_ground is None and len(tile_rects) > 0:
-            transition_check_rect = pygame.Rect(
-                self.rect.centerx - 150,  # Very wide check for better level transitions
-                self.rect.bottom,         # Start at enemy's feet
-                300,                      # Extra wide to ensure level transitions work
-                64                        # Check a full tile height down
-            )
             
-            for tile_rect in tile_rects:
-                if transition_check_rect.colliderect(tile_rect):
-                    # Use the highest ground found
-                    if found_ground is None or tile_rect.top < found_ground:
-                        found_ground = tile_rect.top
+            # Use the highest ground found
+            found_ground = highest_tile_top(transition_check_rect, tile_rects)
         
         # Store previous ground for reference
         if not hasattr(self, '_prev_found_ground'):
@@ -404,3 +518,9 @@ class Enemy(pygame.sprite.Sprite):
         
         # Return the highest ground found or None
         return found_ground
+
+    def resolve_tiles_and_ground(self, tile_rects):
+        """rigid_body.check_tile_collision + check_tile_collision_below in one pass"""
+        found_ground = self.rigid_body.resolve_and_ground(tile_rects, *self.ground_probes())
+        self._prev_found_ground = found_ground
+        return found_ground
@@ -1,9 +1,60 @@
 import pygame
 import os
 import csv
+from concurrent.futures import ThreadPoolExecutor
+
+# how many frames ahead of the current one get decoded in the background
+BG_PREFETCH_AHEAD = 2
+
+# decoded background JPGs are saved next to the source as uncompressed BMP and
+# loaded from there on later runs (set False to always decode the JPG)
+BG_DECODE_CACHE = True
+
+# levels up to this many pixels get their tiles pre-composited into one Surface
+# (4 bytes each – the default is ~16 MB); bigger maps fall back to per-tile blits
+MAX_TILE_LAYER_PIXELS = 4096 * 1024
+
+def _decode_frame(path):
+    """
+    Load one background frame.  The first run decodes the JPG and writes a
+    sibling '<name>.cache.bmp'; later runs read that instead, which is mostly
+    a memcpy rather than a JPEG decode.  Safe to call from worker threads.
+    """
+    if not BG_DECODE_CACHE:
+        return pygame.image.load(path)
+    cache_path = os.path.splitext(path)[0] + ".cache.bmp"
+    try:
+        if os.stat(cache_path).st_mtime >= os.stat(path).st_mtime:
+            return pygame.image.load(cache_path)
+    except (OSError, pygame.error):
+        pass  # no cache yet / stale / unreadable → decode the JPG below
+    surf = pygame.image.load(path)
+    try:
+        pygame.image.save(surf, cache_path)
+    except (OSError, pygame.error):
+        pass  # read-only asset folder: just keep decoding each run
+    return surf
+
+# JPEG decode releases the GIL, so upcoming background frames are decoded on
+# worker threads – one small pool shared by every AnimatedBackground (see
+# shutdown_background_workers() for exit)
+_BG_EXECUTOR = ThreadPoolExecutor(max_workers=2)
+
+def shutdown_background_workers():
+    """Stop the background-decode pool (drops any frames still queued)"""
+    _BG_EXECUTOR.shutdown(wait=True, cancel_futures=True)
+
+# path → Future of a decoded but not yet display-converted Surface. LevelManager
+# queues these on worker threads at start-up; the loaders below take them over
+# and do the convert on the main thread (SDL video calls aren't thread-safe)
+_RAW_PENDING = {}
+
+def _take_raw(path, decode):
+    fut = _RAW_PENDING.pop(path, None)
+    return fut.result() if fut is not None else decode(path)
 
 class AnimatedBackground:
-    def __init__(self, image_folder, frame_count, animation_speed=0.8):
+    def __init__(self, image_folder, frame_count, animation_speed=0.8, crop=None):
         """
         Initialize animated background with smooth linear blending between frames.
         
@@ -11,6 +62,10 @@ class AnimatedBackground:
             image_folder: Path to folder containing background frames (0001.jpg, 0002.jpg, …)
             frame_count: Number of frames in that folder
             animation_speed: Seconds it takes to fade from one frame to the next
+            crop: Optional Rect (in source-frame pixels) of the only part that is
+                  ever visible. Frames are trimmed to it at load, so blends and
+                  blits only touch those pixels; draw() still takes the position
+                  of the full frame.
         """
         # ── LAZY FRAME LOADING OPTIMIZATION ──
         # Instead of loading *all* frames up-front (very slow on large JPG sets),
@@ -22,13 +77,27 @@ class AnimatedBackground:
         self.animation_timer = 0.0
         self.animation_speed = animation_speed
         self.transition_progress = 0.0  # 0.0 → just current frame, 1.0 → just next frame
+        self._last_alpha = []           # per frame: alpha currently set on that Surface
+        self._full_size = None          # size of the source JPGs (what callers see)
+        self._crop = pygame.Rect(crop) if crop is not None else None
+        # Upcoming frames are decoded on the shared _BG_EXECUTOR; the
+        # display-format convert() still happens on the main thread
+        self._pending = {}              # frame idx → Future of the raw decoded Surface
 
-        # Populate the path list (0001.jpg, 0002.jpg, …)
+        # Populate the path list (0001.jpg, 0002.jpg, …) – one directory scan
+        # instead of an exists() stat per frame
+        try:
+            with os.scandir(image_folder) as it:
+                present = {e.name for e in it}
+        except OSError:
+            present = set()
         for i in range(1, frame_count + 1):
-            frame_path = os.path.join(image_folder, f"{i:04d}.jpg")
-            if os.path.exists(frame_path):
+            frame_name = f"{i:04d}.jpg"
+            if frame_name in present:
+                frame_path = os.path.join(image_folder, frame_name)
                 self.frame_paths.append(frame_path)
                 self.frames.append(None)  # placeholder – not yet loaded
+                self._last_alpha.append(None)
 
         if not self.frame_paths:
             raise FileNotFoundError(f"No background frames found in {image_folder}")
@@ -36,19 +105,47 @@ class AnimatedBackground:
         # Immediately load the very first frame so that get_size() works and the
         # screen isn’t blank on the first draw.
         self._ensure_frame_loaded(0)
+        # One reusable surface for cross-fades instead of two copies per frame
+        self._blend_buf = self.frames[0].copy()
+        self._blend_key = None          # (frame idx, alpha bucket) held by the buffer
         print(f"[AnimatedBackground] Prepared {len(self.frame_paths)} frames from '{image_folder}' (lazy loading)")
 
     # ── INTERNAL: load frame *idx* if it has not been loaded yet ──
     def _ensure_frame_loaded(self, idx):
         if 0 <= idx < len(self.frame_paths) and self.frames[idx] is None:
             try:
-                surf = pygame.image.load(self.frame_paths[idx]).convert()
+                fut = self._pending.pop(idx, None)
+                if fut is not None:
+                    raw = fut.result()  # usually already finished
+                else:
+                    raw = _take_raw(self.frame_paths[idx], _decode_frame)
+                # match the screen's exact pixel format so blits take SDL's
+                # opaque same-format fast path (no per-pixel conversion)
+                display = pygame.display.get_surface()
+                surf = raw.convert(display) if display is not None else raw
+                if self._full_size is None:
+                    self._full_size = surf.get_size()
+                    if self._crop is not None:
+                        self._crop = self._crop.clip(surf.get_rect())
+                if self._crop is not None:
+                    surf = surf.subsurface(self._crop).copy()
                 self.frames[idx] = surf
             except Exception as e:
                 # If load fails, keep None so we don’t crash; will fallback later
                 print(f"[AnimatedBackground] Failed to load frame {idx}: {e}")
                 self.frames[idx] = pygame.Surface((1, 1))  # tiny placeholder
     
+    # ── INTERNAL: start decoding frame *idx* on a worker thread ──
+    def _prefetch(self, idx):
+        if self.frames[idx] is None and idx not in self._pending:
+            self._pending[idx] = _BG_EXECUTOR.submit(_decode_frame, self.frame_paths[idx])
+
+    # ── INTERNAL: only touch SDL's alpha state when the value actually changes ──
+    def _set_frame_alpha(self, idx, alpha):
+        if self._last_alpha[idx] != alpha:
+            self.frames[idx].set_alpha(alpha)
+            self._last_alpha[idx] = alpha
+
     def update(self, dt):
         """Advance the animation timer by dt (seconds), then update frames with linear blending."""
         self.animation_timer += dt
@@ -60,6 +157,9 @@ class AnimatedBackground:
             self.animation_timer = 0.0
             self.transition_progress = 0.0
             self.current_frame = (self.current_frame + 1) % len(self.frames)
+            # queue the frames we'll need next so they're ready before the fade
+            for k in range(1, BG_PREFETCH_AHEAD + 1):
+                self._prefetch((self.current_frame + k) % len(self.frames))
     
     def get_current_frame(self):
         """
@@ -76,38 +176,70 @@ class AnimatedBackground:
         if len(self.frames) <= 1:
             return self.frames[self.current_frame]
         
-        cur = self.frames[self.current_frame]
-        nxt_idx = (self.current_frame + 1) % len(self.frames)
+        cur_idx = self.current_frame
+        cur = self.frames[cur_idx]
+        nxt_idx = (cur_idx + 1) % len(self.frames)
         nxt = self.frames[nxt_idx]
         
         # If we're almost at the start or end of a transition, just return one cleanly:
+        # (frames handed out on their own must be opaque again)
         if self.transition_progress < 0.01:
+            self._set_frame_alpha(cur_idx, None)
             return cur
         elif self.transition_progress > 0.99:
+            self._set_frame_alpha(nxt_idx, None)
             return nxt
         
-        # Otherwise, blend linearly
+        # Otherwise, blend linearly – alpha is stepped in 16 buckets so the
+        # Surface alpha only changes ~16 times per transition, not every frame
+        alpha = (int(255 * self.transition_progress) >> 4) << 4
+        key = (cur_idx, alpha)
+        if key == self._blend_key:
+            # same frame pair, same bucket → the buffer already holds this blend
+            return self._blend_buf
+        # Frames are opaque convert()'d surfaces (no per-pixel alpha), so the blit
+        # below is SDL's single surface-alpha blend, not the slow dual-alpha path.
         try:
-            blended = cur.copy()
-            alpha = int(255 * self.transition_progress)
-            temp = nxt.copy()
-            temp.set_alpha(alpha)
-            blended.blit(temp, (0, 0))
+            blended = self._blend_buf
+            self._set_frame_alpha(cur_idx, None)
+            blended.blit(cur, (0, 0))
+            self._set_frame_alpha(nxt_idx, alpha)
+            blended.blit(nxt, (0, 0))
+            self._blend_key = key
             return blended
         except Exception:
             # Fallback: pick whichever is closer
             return cur if self.transition_progress < 0.5 else nxt
     
+    def draw(self, target, pos=(0, 0)):
+        """
+        Blit the current (cross-faded) background onto *target*.  The blend is
+        cached per alpha bucket in get_current_frame(), so on most frames this
+        is a single opaque blit.
+        """
+        if self._crop is not None:
+            pos = (pos[0] + self._crop.x, pos[1] + self._crop.y)
+        target.blit(self.get_current_frame(), pos)
+
     def get_size(self):
         """Return (width, height) of a single frame (all frames assumed identical size)."""
-        if self.frames:
-            return self.frames[0].get_size()
+        if self._full_size:
+            return self._full_size
         return (0, 0)
 
+# ── shared tile images: the same PNG path is only decoded once across levels ──
+_IMAGE_CACHE = {}
+
+def _load_image(path):
+    surf = _IMAGE_CACHE.get(path)
+    if surf is None:
+        surf = _IMAGE_CACHE[path] = _take_raw(path, pygame.image.load).convert_alpha()
+    return surf
+
 class Tile:
     def __init__(self, tile_id, image_path, solid=False):
         self.tile_id = tile_id
-        self.image = pygame.image.load(image_path).convert_alpha() if image_path else None
+        self.image = _load_image(image_path) if image_path else None
         self.solid = solid
 
 class Level:
@@ -128,6 +260,12 @@ class Level:
         self.animated_background = None
         self.background_speed = 0.8
         self.tile_size = 64
+        self._solid_rects = []
+        self._ground_y_by_col = []      # per column: y of the lowest tile, or None
+        self._spawn_cache = {}          # spawn_type → (x, y)
+        self._world_rects_cache = {}    # world x offset → solid rects shifted by it
+        self.tile_layer = None          # all tiles pre-blitted into one Surface
+        self._tile_arr = []             # tile-ID → image (list index instead of dict)
         
         self.load_level()
     
@@ -136,29 +274,69 @@ class Level:
         map_path = os.path.join(self.level_path, "map.csv")
         if os.path.exists(map_path):
             with open(map_path, 'r') as f:
-                reader = csv.reader(f)
-                self.map_data = [[int(cell) for cell in row] for row in reader]
+                # csv.reader splits in C; map(int, …) keeps the conversion out of bytecode
+                self.map_data = [list(map(int, row)) for row in csv.reader(f)]
             print(f"[Level] Loaded map.csv ({len(self.map_data)} rows).")
         else:
             print(f"[Level] Warning: '{map_path}' not found.")
         
         # ── 2) Load tile images from “tiles” folder ──
         tiles_dir = os.path.join(self.level_path, "tiles")
-        if os.path.exists(tiles_dir) and os.path.isdir(tiles_dir):
-            for fname in os.listdir(tiles_dir):
-                if fname.endswith(".png"):
-                    try:
-                        tid = int(fname.split('.')[0])
-                        path = os.path.join(tiles_dir, fname)
-                        self.tiles[tid] = Tile(tid, path, solid=True)
-                        print(f"[Level] Loaded tile ID {tid} from '{fname}'.")
-                    except ValueError:
-                        print(f"[Level] Warning: cannot parse tile ID from '{fname}'.")
+        if os.path.isdir(tiles_dir):
+            # scandir hands back DirEntry objects with cached type info (no extra stats)
+            with os.scandir(tiles_dir) as it:
+                entries = [e for e in it if e.name.endswith(".png") and e.is_file()]
+            for entry in entries:
+                fname = entry.name
+                try:
+                    tid = int(fname.rpartition('.')[0])
+                    self.tiles[tid] = Tile(tid, entry.path, solid=True)
+                    print(f"[Level] Loaded tile ID {tid} from '{fname}'.")
+                except ValueError:
+                    print(f"[Level] Warning: cannot parse tile ID from '{fname}'.")
         else:
             print(f"[Level] Warning: tiles folder not found in '{self.level_path}'.")
+
+        # Tile IDs are small ints, so index a list instead of hashing into the dict:
+        # _tile_arr[tid] → tile image, or None for unknown/image-less IDs
+        ids = [tid for tid in self.tiles if tid >= 0]
+        self._tile_arr = [None] * (max(ids) + 1 if ids else 0)
+        for tid in ids:
+            self._tile_arr[tid] = self.tiles[tid].image
         
         # ── 3) Load animated background (if “Background” folder exists) ──
         self.load_animated_background()
+
+        # ── 4) Map + tiles are fixed from here on, so collect solid rects once ──
+        self.rebuild_solid_rects()
+
+        # ── 5) ...and composite the whole tile layer once ──
+        self.rebuild_tile_layer()
+
+    def rebuild_tile_layer(self):
+        """Pre-render every tile into self.tile_layer (None if the map is empty/too big)."""
+        self.tile_layer = None
+        if not self.map_data:
+            return
+        ts = self.tile_size
+        tile_imgs = self._tile_arr
+        n_ids = len(tile_imgs)
+        placed = [(tile_imgs[tid], (c * ts, r * ts))
+                  for r, row in enumerate(self.map_data)
+                  for c, tid in enumerate(row)
+                  if 0 <= tid < n_ids and tile_imgs[tid] is not None]
+        if not placed:
+            return
+        # Tile images aren't scaled to the grid (they can be bigger than ts and
+        # hang past their cell), so size the layer to what actually gets drawn
+        w = max(x + img.get_width() for img, (x, y) in placed)
+        h = max(y + img.get_height() for img, (x, y) in placed)
+        if w * h > MAX_TILE_LAYER_PIXELS:
+            return
+        layer = pygame.Surface((w, h), pygame.SRCALPHA).convert_alpha()
+        layer.fill((0, 0, 0, 0))
+        layer.blits(placed, doreturn=False)
+        self.tile_layer = layer
     
     def load_animated_background(self):
         bg_folder = os.path.join(self.level_path, "Background")
@@ -181,24 +359,53 @@ class Level:
             self.animated_background = None
 
 
-    def get_solid_tile_rects(self):
+    def rebuild_solid_rects(self):
         """
-        Return a list of pygame.Rect for every solid tile in this level.
+        Walk map_data and cache a pygame.Rect for every solid tile.
         A tile is “solid” if its tile-ID ≠ -1 AND the corresponding Tile object has a non‐None .image.
+        Call again if map_data / tiles ever get edited at runtime.
         """
-        solid_rects = []
         ts = self.tile_size
-        for row_idx, row in enumerate(self.map_data):
-            for col_idx, tid in enumerate(row):
-                if tid != -1 and tid in self.tiles:
-                    tile = self.tiles[tid]
-                    # If tile.image is not None, assume solid. Adjust if you have non‐solid image tiles.
-                    if tile.image:
-                        world_x = col_idx * ts
-                        world_y = row_idx * ts
-                        solid_rects.append(pygame.Rect(world_x, world_y, ts, ts))
-        return solid_rects
-    
+        # If tile.image is not None, assume solid. Adjust if you have non‐solid image tiles.
+        # (-1 is never a key, so one set lookup covers both checks per cell)
+        solid_ids = {tid for tid, tile in self.tiles.items() if tile.image and tid != -1}
+        solid_coords = [
+            (col_idx * ts, row_idx * ts)
+            for row_idx, row in enumerate(self.map_data)
+            for col_idx, tid in enumerate(row)
+            if tid in solid_ids
+        ]
+        self._solid_rects = [pygame.Rect(x, y, ts, ts) for x, y in solid_coords]
+
+        # Same bottom-up column scan get_ground_y_at() used to do per call
+        cols = len(self.map_data[0]) if self.map_data else 0
+        ground = [None] * cols
+        for r in range(len(self.map_data) - 1, -1, -1):
+            row = self.map_data[r]
+            for c in range(min(cols, len(row))):
+                if ground[c] is None and row[c] != -1 and row[c] in self.tiles:
+                    ground[c] = r * ts
+        self._ground_y_by_col = ground
+        self._spawn_cache = {}
+        self._world_rects_cache = {}
+
+    def get_solid_tile_rects(self):
+        """
+        Return the cached list of pygame.Rect for every solid tile in this level
+        (shared list – don't mutate it).
+        """
+        return self._solid_rects
+
+    def get_world_solid_tile_rects(self, offset_x):
+        """
+        Solid tile rects shifted into world space by offset_x (the level's start x).
+        Built once per offset and reused – shared list, don't mutate it.
+        """
+        rects = self._world_rects_cache.get(offset_x)
+        if rects is None:
+            rects = self._world_rects_cache[offset_x] = [t.move(offset_x, 0) for t in self._solid_rects]
+        return rects
+
     def update(self, dt):
         """Update the background animation (if any) each frame."""
         if self.animated_background:
@@ -221,20 +428,24 @@ class Level:
         The *x_pixel* value is interpreted in the level's local coordinate system (not
         world-space).  If no ground is found this returns *None*."""
         col = int(x_pixel // self.tile_size)
-        if col < 0 or col >= (len(self.map_data[0]) if self.map_data else 0):
+        if col < 0 or col >= len(self._ground_y_by_col):
             return None
-        # Search from bottom row upwards so we get the uppermost ground tile
-        for r in range(len(self.map_data) - 1, -1, -1):
-            tid = self.map_data[r][col]
-            if tid != -1 and tid in self.tiles:
-                return r * self.tile_size
-        return None
+        # Looked up from the per-column table built in rebuild_solid_rects()
+        return self._ground_y_by_col[col]
 
     def get_spawn_position(self, spawn_type="top_tile"):
         """
         Return (x, y) on top of the first solid tile in map_data.
         Currently only supports “top_tile” mode.
+        The map is static, so each spawn_type is only searched for once.
         """
+        pos = self._spawn_cache.get(spawn_type)
+        if pos is None:
+            pos = self._find_spawn_position(spawn_type)
+            self._spawn_cache[spawn_type] = pos
+        return pos
+
+    def _find_spawn_position(self, spawn_type):
         if spawn_type == "top_tile":
             # Look for a solid tile that has empty space above it (good ground spawn)
             # Search from bottom row upwards so we favour lower ground tiles
@@ -272,19 +483,48 @@ class Level:
         """
         Draw each tile at (col*tile_size, row*tile_size) minus camera offset.
         Only blit if on-screen (plus a margin of one tile).
+        Uses the pre-rendered tile layer when there is one (a single blit);
+        otherwise visible tiles are grouped by tile-ID so each tile image is
+        submitted once with all of its destinations.
         """
-        for r, row in enumerate(self.map_data):
-            for c, tid in enumerate(row):
-                if tid != -1 and tid in self.tiles:
-                    tile = self.tiles[tid]
-                    if tile.image:
-                        world_x = c * self.tile_size
-                        world_y = r * self.tile_size
-                        screen_x = world_x - cam_x
-                        screen_y = world_y - cam_y
-                        if -self.tile_size <= screen_x <= screen.get_width() and \
-                           -self.tile_size <= screen_y <= screen.get_height():
-                            screen.blit(tile.image, (screen_x, screen_y))
+        if self.tile_layer is not None:
+            screen.blit(self.tile_layer, (-cam_x, -cam_y))
+            return
+        ts = self.tile_size
+        scr_w, scr_h = screen.get_size()
+        positions_by_tid = {}
+        if not self.map_data:
+            return
+        # Only walk the rows/cols that can land on screen instead of the whole map
+        row0 = max(0, int((cam_y - ts) // ts))
+        row1 = min(len(self.map_data), int((cam_y + scr_h) // ts) + 1)
+        col0 = max(0, int((cam_x - ts) // ts))
+        col1 = int((cam_x + scr_w) // ts) + 1
+        tile_imgs = self._tile_arr
+        n_ids = len(tile_imgs)
+        for r in range(row0, row1):
+            row = self.map_data[r]
+            world_y = r * ts
+            screen_y = world_y - cam_y
+            if not (-ts <= screen_y <= scr_h):
+                continue
+            for c in range(col0, min(col1, len(row))):
+                tid = row[c]
+                if 0 <= tid < n_ids and tile_imgs[tid] is not None:
+                    screen_x = c * ts - cam_x
+                    if -ts <= screen_x <= scr_w:
+                        pts = positions_by_tid.get(tid)
+                        if pts is None:
+                            pts = positions_by_tid[tid] = []
+                        pts.append((screen_x, screen_y))
+        if hasattr(screen, 'fblits'):
+            # pygame-ce: (surface, [positions]) keeps the source cached across destinations
+            screen.fblits([(tile_imgs[tid], pts) for tid, pts in positions_by_tid.items()])
+        else:
+            # still issued image-by-image so consecutive blits reuse the same source
+            screen.blits([(tile_imgs[tid], p)
+                          for tid, pts in positions_by_tid.items() for p in pts],
+                         doreturn=False)
 
 class LevelManager:
     def __init__(self):
@@ -297,21 +537,44 @@ class LevelManager:
         """
         Scan the “Level/” directory (sibling to this script) for subfolders.
         Each subfolder (e.g. “level0”, “level1”) is loaded as a Level.
+        PNG/JPG decoding releases the GIL, so every level's tile images and
+        first background frame are decoded on a thread pool up front; the
+        Levels are then built here, where convert()/convert_alpha() (which
+        touch the display) stay on the main thread.
         """
         base = os.path.join(os.path.dirname(__file__), "Level")
         if os.path.exists(base) and os.path.isdir(base):
-            for name in os.listdir(base):
-                full = os.path.join(base, name)
-                if os.path.isdir(full):
+            with os.scandir(base) as it:
+                dirs = [(e.name, e.path) for e in it if e.is_dir()]
+            with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as ex:
+                for name, full in dirs:
+                    for path, decode in self._startup_images(full):
+                        if path not in _RAW_PENDING and path not in _IMAGE_CACHE:
+                            _RAW_PENDING[path] = ex.submit(decode, path)
+                for name, full in dirs:
                     try:
-                        lvl = Level(full)
-                        self.levels[name] = lvl
+                        self.levels[name] = Level(full)
                         print(f"[LevelManager] Loaded '{name}'.")
                     except Exception as e:
                         print(f"[LevelManager] Failed loading '{name}': {e}")
+            _RAW_PENDING.clear()  # anything a Level didn't end up using
         else:
             print(f"[LevelManager] No Level folder found at '{base}'.")
     
+    @staticmethod
+    def _startup_images(level_path):
+        """(path, decoder) for the images Level(level_path) loads straight away"""
+        found = []
+        tiles_dir = os.path.join(level_path, "tiles")
+        if os.path.isdir(tiles_dir):
+            with os.scandir(tiles_dir) as it:
+                found += [(e.path, pygame.image.load) for e in it
+                          if e.name.endswith(".png") and e.is_file()]
+        first_bg = os.path.join(level_path, "Background", "0001.jpg")
+        if os.path.isfile(first_bg):
+            found.append((first_bg, _decode_frame))
+        return found
+
     def get_available_levels(self):
         """Return a list of all loaded level names."""
         return list(self.levels.keys())
@@ -1,71 +1,142 @@
-import pygame, os
+import pygame, os, math
 # Ensure mixer is initialised for sound playback
 if not pygame.mixer.get_init():
     pygame.mixer.init()
-from rigidbody import RigidBody
+from concurrent.futures import ThreadPoolExecutor
+from rigidbody import RigidBody, highest_tile_top
 
 # ── constants & configuration ──
 IMG_DIR     = os.path.join(os.path.dirname(__file__), 'img')
 PLAYER_SIZE = (600, 600)   # all frames will be scaled to 600×600 px
+# (source PNGs are 1000×1000; this is the size they're drawn at on screen,
+#  so the one scale in load_frames is the only resize a frame ever gets)
 
 # tweak these values to adjust gameplay feel:
 MOVE_SPEED    = 7          # walking speed: 5 px per frame
 DASH_SPEED    = 15         # dash speed: 15 px per frame
 DASH_DURATION = 400        # dash lasts 400 milliseconds
 ATTACK_DIST   = 70         # lunge forward distance on attack, in pixels
-ATTACK_TIME   = 100        # (unused) ms for attack lunge
+ATTACK_DAMAGE = {1: 20, 2: 40, 3: 60}  # damage per combo step
 JUMP_V        = -20        # initial jump velocity: move upward 20 px/frame
 GRAVITY       = 0.8        # downward acceleration per frame
+RISING_VY     = -1.0       # moving up faster than this → can't land, skip ground scan
 
-# ── easing helper functions ──
+# mixer channels reserved for the player's frequent SFX
+CH_WALK, CH_ATTACK = 0, 1
+SFX_RESERVED_CHANNELS = 2
 
-def ease_out_quad(t):
-    # ease-out: fast start, slow end
-    # e.g. ease_out_quad(0.5) → 1 - (0.5)^2 = 0.75
-    return 1 - (1 - t)**2
+# Combat/state debug prints (hits, counters, blocks). Console writes can stall
+# a frame, so they're off unless you're debugging.
+DEBUG = False
+
+# event types handle_event reacts to; anything else returns straight away
+_INPUT_EVENTS = frozenset({pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP})
 
 
 # ── frame loading utility ──
+_FRAME_CACHE = {}   # folder -> list of frames, shared by every Player()
+_FLIPPED = {}       # frame -> its left-facing twin, built once at load
+# PNG decode releases the GIL, so frame files are decoded on this pool – one
+# for the whole module, shared by every load_frames() call (start-up and lazy)
+_DECODE_POOL = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+def shutdown_frame_decoder():
+    """Stop the frame-decode pool (call on exit)"""
+    _DECODE_POOL.shutdown(wait=True, cancel_futures=True)
+
 def load_frames(folder):
     """
     Load and scale all image files in IMG_DIR/folder.
     Expects filenames like '0.png', '1.png', ... sorted by integer index.
-    Returns a list of scaled Surface objects.
+    Every frame is packed into one atlas surface for the folder and the
+    returned list holds subsurface views into it, so the whole animation
+    shares a single contiguous pixel buffer instead of N separate
+    allocations (and frame access is a view, never a copy).
     """
+    if folder in _FRAME_CACHE:
+        return _FRAME_CACHE[folder]
     path = os.path.join(IMG_DIR, folder)
     files = sorted(os.listdir(path), key=lambda s: int(s.split('.')[0]))
     # example: files = ['0.png','1.png','2.png']
-    return [
-        pygame.transform.scale(
-            pygame.image.load(os.path.join(path, f)).convert_alpha(),
-            PLAYER_SIZE
-        )
-        for f in files
-    ]
+    w, h = PLAYER_SIZE
+    # cols × rows == frame count exactly (largest divisor ≤ √n), so the atlas –
+    # and its mirrored copy – never carry empty 600×600 cells
+    n = max(1, len(files))
+    cols = next(c for c in range(math.isqrt(n), 0, -1) if n % c == 0)
+    rows = n // cols
+    atlas = pygame.Surface((w * cols, h * rows), pygame.SRCALPHA).convert_alpha()
+    atlas.fill((0, 0, 0, 0))
+    # decode the folder on the shared pool; convert_alpha touches the display
+    # and stays on this thread
+    decoded = list(_DECODE_POOL.map(pygame.image.load, [os.path.join(path, f) for f in files]))
+    frames = []
+    for i, raw in enumerate(decoded):
+        cell = pygame.Rect((i % cols) * w, (i // cols) * h, w, h)
+        atlas.blit(pygame.transform.scale(raw.convert_alpha(), PLAYER_SIZE), cell)
+        frames.append(atlas.subsurface(cell))
+    # mirror the whole atlas once; each cell lands at the mirrored x
+    flipped = pygame.transform.flip(atlas, True, False)
+    aw = atlas.get_width()
+    for frame in frames:
+        x, y = frame.get_offset()
+        _FLIPPED[frame] = flipped.subsurface((aw - x - w, y, w, h))
+    _FRAME_CACHE[folder] = frames
+    return frames
+
+# state → animation folder
+# (states stay plain strings/ints: literal state names are interned and
+#  str caches its hash, so self.anims[self.state] never rehashes; `==` on
+#  interned names hits the identity fast path, and CPython already compiles
+#  `state in ('jump', 'jump2')` to a constant frozenset lookup)
+ANIM_FOLDERS = {
+    'idle': 'Player/Player idle',
+    'walk_start': 'Player/Player Walk Start',  # New start frame
+    'walk': 'Player/Player walking',
+    'walk_stop': 'Player/Player Walk Stop',  # New stop frame
+    1     : 'Player/Player Attack 1',
+    2     : 'Player/Player Attack 2',
+    3     : 'Player/Player Attack 3',
+    'jump': 'Player/Player Jump 1',
+    'jump2':'Player/Player Jump 2',
+    'dash': 'Player/Player Dash',
+    'hurt': 'Player/Player Hurt',
+    'death': 'Player/Player Death',
+    'block': 'Player/Player Block',
+    'counter': 'Player/Player Counter',
+    'counter_attack': 'Player/Player Counter Attack',
+    'skill': 'Player/Player Skill',  # new skill animation
+}
+
+# states every fight goes through – loaded up front so the first swing/dash/jump
+# or counter doesn't decode a folder mid-frame (counters are timing-critical);
+# only the rare death and skill animations stay lazy
+PRELOAD_STATES = ('idle', 'walk_start', 'walk', 'walk_stop', 1, 2, 3,
+                  'jump', 'jump2', 'dash', 'block', 'hurt',
+                  'counter', 'counter_attack')
+
+class LazyAnims(dict):
+    """state → frames dict that loads a folder on first lookup"""
+    def __init__(self, folders):
+        super().__init__()
+        self.folders = folders
+        self.last = {}   # state → index of its final frame, filled on load
+
+    def __missing__(self, state):
+        frames = self[state] = load_frames(self.folders[state])
+        self.last[state] = len(frames) - 1
+        return frames
 
 class Player(pygame.sprite.Sprite):
+    # states that own the player until their animation ends (no walk/block input)
+    _ACTION_LOCKED = frozenset({'hurt', 'death', 'skill', 'counter', 'counter_attack'})
+
     def __init__(self, pos):
         super().__init__()
 
-        # load all animation sequences into a dict
-        self.anims = {
-            'idle': load_frames('Player/Player idle'),
-            'walk_start': load_frames('Player/Player Walk Start'),  # New start frame
-            'walk': load_frames('Player/Player walking'),
-            'walk_stop': load_frames('Player/Player Walk Stop'),  # New stop frame
-            1     : load_frames('Player/Player Attack 1'),
-            2     : load_frames('Player/Player Attack 2'),
-            3     : load_frames('Player/Player Attack 3'),
-            'jump': load_frames('Player/Player Jump 1'),
-            'jump2':load_frames('Player/Player Jump 2'),
-            'dash': load_frames('Player/Player Dash'),
-            'hurt': load_frames('Player/Player Hurt'),
-            'death': load_frames('Player/Player Death'),
-            'block': load_frames('Player/Player Block'),
-            'counter': load_frames('Player/Player Counter'),
-            'counter_attack': load_frames('Player/Player Counter Attack'),
-            'skill': load_frames('Player/Player Skill'),  # new skill animation
-        }
+        # animation sequences: the common ones now, rare ones on first use
+        self.anims = LazyAnims(ANIM_FOLDERS)
+        for state in PRELOAD_STATES:
+            self.anims[state]
 
         # initial state - ensure player always starts in idle
         self.state    = 'idle'    # current action or attack number
@@ -115,6 +186,8 @@ class Player(pygame.sprite.Sprite):
         self._skill_damage_dealt = False
         # Skill AOE radius (for visual debug and hit detection)
         self.skill_radius = 250  # customize this value for AOE size
+        self._skill_aoe_surf = None    # debug AOE overlay, built on first draw
+        self._skill_aoe_radius = None
         # Queued skill flag (allows buffering during other actions)
         self.skill_queued = False
 
@@ -125,7 +198,14 @@ class Player(pygame.sprite.Sprite):
         self.sfx_walk = None
         self.sfx_dash = None
         self.sfx_attack = {}
+        self._ch_walk = None
+        self._ch_attack = None
         try:
+            # walk loop and attack swings get their own reserved channels, so
+            # they never hunt for a free one (or get stolen by other SFX)
+            pygame.mixer.set_reserved(SFX_RESERVED_CHANNELS)
+            self._ch_walk = pygame.mixer.Channel(CH_WALK)
+            self._ch_attack = pygame.mixer.Channel(CH_ATTACK)
             p1 = os.path.join('Music', 'Counter.mp3')
             if os.path.isfile(p1):
                 self.sfx_counter = pygame.mixer.Sound(p1)
@@ -165,6 +245,21 @@ class Player(pygame.sprite.Sprite):
 
         # Add a target attribute to reference the enemy
         self.target = None
+        # set by enemies that knock the player back (ms timestamp), None otherwise
+        self.knockback_end_time = None
+        # wired up by main.py after construction
+        self.ui_system = None
+        self.all_enemies = ()
+        # last ground heights seen (kept for reference)
+        self._prev_found_ground = None
+        self._prev_ground_y = None
+
+        # ground probes, moved into place by ground_probes() each frame:
+        # a wider rectangle below the feet - much wider to prevent falling at level transitions
+        self._ground_check_rect = pygame.Rect(0, 0, 80, 33)  # same depth plus the extra pixel
+        # even wider check for level transitions (used when the narrow one finds nothing);
+        # extra wide for seamless transitions, a full tile height down
+        self._transition_check_rect = pygame.Rect(0, 0, 200, 64)
 
         self.max_health = 1000
         self.current_health = self.max_health
@@ -180,13 +275,24 @@ class Player(pygame.sprite.Sprite):
         # Sync the rigid body position with sprite position
         self.world_x = self.rect.x  # Track world position for camera
 
+    @property
+    def target(self):
+        return self._target
+
+    @target.setter
+    def target(self, target):
+        # main.py re-targets every frame; resolve the Yori check here once
+        self._target = target
+        self._target_is_yori = type(target).__name__ == 'Yori'
+
     def take_damage(self, damage, ui_system=None):
         if self.is_dead or self.state in ('hurt', 'death'):
             return  # Don't take damage if already dead or hurt
         
         # Check if player is using skill (invincible during skill)
         if self.state == 'skill':
-            print(f"Player is invincible during skill! {damage} damage missed!")
+            if DEBUG:
+                print(f"Player is invincible during skill! {damage} damage missed!")
             # Create "Miss" text if UI system is provided
             if ui_system:
                 ui_system.add_damage_text(self.rect.centerx, self.rect.centery - 150, "Miss", (255, 255, 0))
@@ -194,14 +300,16 @@ class Player(pygame.sprite.Sprite):
         
         # Check if player is blocking
         if self.blocking:
-            print(f"Player blocked {damage} damage!")
+            if DEBUG:
+                print(f"Player blocked {damage} damage!")
             # Create "Blocked" text if UI system is provided
             if ui_system:
                 ui_system.add_damage_text(self.rect.centerx, self.rect.centery - 150, "Blocked", (60, 80, 120))
             return  # No damage taken when blocking
         
         self.current_health -= damage
-        print(f"Player took {damage} damage! Health: {self.current_health}/{self.max_health}")
+        if DEBUG:
+            print(f"Player took {damage} damage! Health: {self.current_health}/{self.max_health}")
         
         # Create damage text if UI system is provided
         if ui_system:
@@ -212,7 +320,8 @@ class Player(pygame.sprite.Sprite):
             self.is_dead = True
             self.state = 'death'
             self.frame = 0.0
-            print("PLAYER DIED!")
+            if DEBUG:
+                print("PLAYER DIED!")
             # Handle player death (e.g., reset game, show game over screen)
         else:
             # Reset all special states when taking damage
@@ -234,15 +343,19 @@ class Player(pygame.sprite.Sprite):
         # see and tweak.  The colour & alpha make it clearly visible over most
         # backgrounds.
         skill_center = (self.rect.centerx - cam_x, self.rect.centery - cam_y)
-        # Create a temporary surface with per-pixel alpha for the filled circle
+        # Per-pixel alpha surface for the filled circle, rebuilt only when the
+        # radius changes
         radius = self.skill_radius
-        tmp_surf = pygame.Surface((radius*2, radius*2), pygame.SRCALPHA)
-        # Semi-transparent blue fill (alpha 60/255)
-        pygame.draw.circle(tmp_surf, (0, 120, 255, 60), (radius, radius), radius)
-        # Solid outline (width 3)
-        pygame.draw.circle(tmp_surf, (0, 180, 255), (radius, radius), radius, 3)
+        if self._skill_aoe_surf is None or self._skill_aoe_radius != radius:
+            tmp_surf = pygame.Surface((radius*2, radius*2), pygame.SRCALPHA)
+            # Semi-transparent blue fill (alpha 60/255)
+            pygame.draw.circle(tmp_surf, (0, 120, 255, 60), (radius, radius), radius)
+            # Solid outline (width 3)
+            pygame.draw.circle(tmp_surf, (0, 180, 255), (radius, radius), radius, 3)
+            self._skill_aoe_surf = tmp_surf
+            self._skill_aoe_radius = radius
         # Blit centred on player
-        screen.blit(tmp_surf, (skill_center[0]-radius, skill_center[1]-radius))
+        screen.blit(self._skill_aoe_surf, (skill_center[0]-radius, skill_center[1]-radius))
     
     def draw_rigid_body_debug(self, screen, cam_x, cam_y, show_velocity=False):
         """Draw the rigid body collider for debugging"""
@@ -250,48 +363,53 @@ class Player(pygame.sprite.Sprite):
     
     # Debug method removed after fixing jump animation issue
     
+    def ground_probes(self):
+        """The (narrow, wide) rects checked for ground below the player's feet"""
+        # Both rects are allocated once in __init__ and just moved here
+        cx, bottom = self.rect.centerx, self.rect.bottom
+        check_rect = self._ground_check_rect
+        # Start 1 pixel above feet so a tile whose top equals rect.bottom is detected
+        check_rect.x = cx - 40
+        check_rect.y = bottom - 1
+        transition_check_rect = self._transition_check_rect
+        transition_check_rect.x = cx - 100  # Very wide check (nearly 2 tiles wide)
+        transition_check_rect.y = bottom    # Start at player's feet
+        return check_rect, transition_check_rect
+
     def check_tile_collision_below(self, tile_rects):
         """Check if there's a solid tile below the player for ground detection"""
-        # Create a wider rectangle below the player's feet - much wider to prevent falling at level transitions
-        # Start 1 pixel above feet so a tile whose top equals rect.bottom is detected
-        check_rect = pygame.Rect(
-            self.rect.centerx - 40,
-            self.rect.bottom - 1,
-            80,
-            33  # cover same depth plus the extra pixel
-        )
+        # Rising fast: we can't land this frame, so skip both probe scans
+        if self.rigid_body.velocity_y < RISING_VY:
+            self._prev_found_ground = None
+            return None
+        check_rect, transition_check_rect = self.ground_probes()
         
-        # Check collision with any tile
-        found_ground = None
-        for tile_rect in tile_rects:
-            if check_rect.colliderect(tile_rect):
-                # If we find multiple ground tiles, use the highest one
-                if found_ground is None or tile_rect.top < found_ground:
-                    found_ground = tile_rect.top
+        # Check collision with any tile (if we find multiple ground tiles, use the highest one)
+        found_ground = highest_tile_top(check_rect, tile_rects)
         
         # If no ground found with initial check, try an even wider check for level transitions
         if found_ground is None and len(tile_rects) > 0:
-            transition_check_rect = pygame.Rect(
-                self.rect.centerx - 100,  # Very wide check (nearly 2 tiles wide)
-                self.rect.bottom,         # Start at player's feet
-                200,                      # Extra wide for seamless level transitions
-                64                        # Check a full tile height down
-            )
             
-            for tile_rect in tile_rects:
-                if transition_check_rect.colliderect(tile_rect):
-                    # Use the highest ground found
-                    if found_ground is None or tile_rect.top < found_ground:
-                        found_ground = tile_rect.top
+            # Use the highest ground found
+            found_ground = highest_tile_top(transition_check_rect, tile_rects)
         
         # Store previous ground for reference (debug prints removed)
-        if not hasattr(self, '_prev_found_ground'):
-            self._prev_found_ground = found_ground
         self._prev_found_ground = found_ground
         
         # Return the highest ground found or None
         return found_ground
 
+    def resolve_tiles_and_ground(self, tile_rects):
+        """rigid_body.check_tile_collision + check_tile_collision_below in one pass"""
+        if self.rigid_body.velocity_y < RISING_VY:
+            # Rising: walls/ceilings still resolve, but there's no ground to find
+            self.rigid_body.check_tile_collision(tile_rects)
+            found_ground = None
+        else:
+            found_ground = self.rigid_body.resolve_and_ground(tile_rects, *self.ground_probes())
+        self._prev_found_ground = found_ground
+        return found_ground
+
     def update_attack_point(self):
         # Update the attack point position based on player direction during attacks and counter attacks
         if isinstance(self.state, int) or self.state == 'counter_attack':  # Attack states (1, 2, 3) or counter attack
@@ -303,11 +421,14 @@ class Player(pygame.sprite.Sprite):
             self.attack_point = (self.rect.centerx, self.rect.centery)
 
     def check_attack_hit(self, enemy):
-        # Check if the attack point hits the enemy
-        distance = pygame.math.Vector2(self.attack_point).distance_to(enemy.rect.center)
+        # Check if the attack point hits the enemy (squared distance, no sqrt)
+        ax, ay = self.attack_point
+        ex, ey = enemy.rect.center
+        dx, dy = ax - ex, ay - ey
+        r = self.attack_radius + enemy.rect.width * 0.5
         # Ensure the enemy is in the direction the player is facing
-        enemy_direction = 1 if enemy.rect.centerx > self.rect.centerx else -1
-        return distance <= self.attack_radius + enemy.rect.width / 2 and enemy_direction == self.facing
+        enemy_direction = 1 if ex > self.rect.centerx else -1
+        return dx*dx + dy*dy <= r*r and enemy_direction == self.facing
     
     def check_counter_timing(self):
         """Check if enemy is in the counter window (50%-70% of attack animation)"""
@@ -315,26 +436,12 @@ class Player(pygame.sprite.Sprite):
             return False
         
         # Handle different enemy types
-        if hasattr(self.target, '__class__') and self.target.__class__.__name__ == 'Yori':
-            # Yori boss - check for any of the 3 attack states
-            if self.target.state not in ('attack1', 'attack2', 'attack3'):
-                return False
-            
-            # Get the appropriate attack animation based on current state
-            if self.target.state == 'attack1':
-                attack_frames = self.target.attack1
-            elif self.target.state == 'attack2':
-                attack_frames = self.target.attack2
-            elif self.target.state == 'attack3':
-                attack_frames = self.target.attack3
-            else:
-                return False
-            
-            # Counter window: between 30% and 70% of Yori's current attack animation
-            counter_frame_start = len(attack_frames) * 0.3
-            counter_frame_end = len(attack_frames) * 0.7
-            
-            return (counter_frame_start <= self.target.frame <= counter_frame_end and 
+        if self._target_is_yori:
+            # Yori boss - counter window (30%-70%) of whichever attack is playing;
+            # None when Yori isn't in one of the 3 attack states
+            window = self.target._counter_windows.get(self.target.state)
+            return (window is not None and
+                    window[0] <= self.target.frame <= window[1] and
                     not self.target.damage_dealt)
         
         else:
@@ -343,8 +450,8 @@ class Player(pygame.sprite.Sprite):
                 return False
             
             # Use a tighter counter window (30%-70%) to prevent very early counters
-            counter_frame_start = len(self.target.attack) * 0.3
-            counter_frame_end = len(self.target.attack) * 0.7
+            counter_frame_start = self.target._counter_lo
+            counter_frame_end = self.target._counter_hi
             
             # Check if we're strictly inside the window (exclude the exact edges) –
             # this avoids accidental counters on the very first animation frame.
@@ -361,7 +468,8 @@ class Player(pygame.sprite.Sprite):
     
     def perform_counter(self):
         """Successfully counter the enemy attack"""
-        print("PERFECT COUNTER!")
+        if DEBUG:
+            print("PERFECT COUNTER!")
         if self.sfx_counter:
             self.sfx_counter.play()
         self.countering = True
@@ -382,32 +490,37 @@ class Player(pygame.sprite.Sprite):
             
             # Prevent enemy from dealing damage
             self.target.damage_dealt = True
-            print("Enemy damage blocked by perfect counter!")
+            if DEBUG:
+                print("Enemy damage blocked by perfect counter!")
             
             # Stun the enemy for 2 seconds
             if hasattr(self.target, 'stun'):
                 self.target.stun_end_time = __import__('time').time() + 2.0  # 2 seconds stun
                 self.target.stun()
-                print("Enemy stunned for 2 seconds!")
-            elif hasattr(self.target, '__class__') and self.target.__class__.__name__ == 'Yori':
+                if DEBUG:
+                    print("Enemy stunned for 2 seconds!")
+            elif self._target_is_yori:
                 # For Yori boss, interrupt the attack combo and reset to idle
-                print("Yori attack countered! Combo interrupted!")
+                if DEBUG:
+                    print("Yori attack countered! Combo interrupted!")
                 self.target.in_combo = False
                 self.target.state = 'idle'
                 self.target.frame = 0.0
                 self.target.next_action_time = __import__('time').time() + 2.0  # 2 second pause
                 self.target.damage_dealt = True  # Prevent damage from current attack
         
-        print("Counter attack ready! Left-click NOW to perform counter attack!")
+        if DEBUG:
+            print("Counter attack ready! Left-click NOW to perform counter attack!")
     
     def counter_failed(self):
         """Failed to counter - show miss text, stop blocking, and allow damage"""
-        print("COUNTER FAILED - MISS!")
+        if DEBUG:
+            print("COUNTER FAILED - MISS!")
         if self.sfx_counter:
             self.sfx_counter.play()
         
         # Show miss text if UI system is available
-        if hasattr(self, 'ui_system') and self.ui_system:
+        if self.ui_system:
             self.ui_system.add_damage_text(self.rect.centerx, self.rect.centery - 100, "MISS", (255, 100, 100))
         
         # Stop blocking immediately - player will take damage
@@ -427,11 +540,13 @@ class Player(pygame.sprite.Sprite):
             self.flip = (self.facing == -1)
         
         # Don't prevent enemy damage - player will get hit
-        print("Player is vulnerable to enemy attack!")
+        if DEBUG:
+            print("Player is vulnerable to enemy attack!")
     
     def start_counter_attack(self):
         """Start the counter attack after successful counter"""
-        print("Starting counter attack!")
+        if DEBUG:
+            print("Starting counter attack!")
         if self.sfx_counter_attack:
             self.sfx_counter_attack.play()
         self.counter_attacking = True
@@ -452,16 +567,16 @@ class Player(pygame.sprite.Sprite):
     
     def perform_counter_attack_damage(self):
         """Deal damage during counter attack and stun enemy"""
-        print(f"DEBUG: Attempting counter attack damage - target exists: {self.target is not None}")
+        if DEBUG:
+            print(f"DEBUG: Attempting counter attack damage - target exists: {self.target is not None}")
         if self.target:
-            print(f"DEBUG: Player attack point: {self.attack_point}, facing: {self.facing}")
-            print(f"DEBUG: Enemy position: {self.target.rect.center}")
-            distance = pygame.math.Vector2(self.attack_point).distance_to(self.target.rect.center)
-            enemy_direction = 1 if self.target.rect.centerx > self.rect.centerx else -1
-            print(f"DEBUG: Distance: {distance}, Attack radius: {self.attack_radius}, Enemy direction: {enemy_direction}")
+            if DEBUG:
+                print(f"DEBUG: Player attack point: {self.attack_point}, facing: {self.facing}")
+                print(f"DEBUG: Enemy position: {self.target.rect.center}")
             
             if self.check_attack_hit(self.target):
-                print(f"Counter attack hits for {self.counter_attack_damage} damage!")
+                if DEBUG:
+                    print(f"Counter attack hits for {self.counter_attack_damage} damage!")
                 
                 # Temporarily allow damage to stunned enemy for counter attack
                 was_stunned = (self.target.state == 'stun')
@@ -471,10 +586,10 @@ class Player(pygame.sprite.Sprite):
                     self.target.state = 'idle'
                 
                 # Deal damage normally first
-                self.target.take_damage(self.counter_attack_damage, getattr(self, 'ui_system', None))
+                self.target.take_damage(self.counter_attack_damage, self.ui_system)
                 
                 # If target is Yori, also trigger block animation
-                if hasattr(self.target, '__class__') and self.target.__class__.__name__ == 'Yori':
+                if self._target_is_yori:
                     if self.target.current_health > 0:  # Only if Yori is still alive
                         self.target.start_block_animation()
                 
@@ -487,11 +602,14 @@ class Player(pygame.sprite.Sprite):
                     if hasattr(self.target, 'stun_timer'):
                         self.target.stun_timer = 0
                 
-                print("Counter attack damage dealt!")
+                if DEBUG:
+                    print("Counter attack damage dealt!")
             else:
-                print("Counter attack missed!")
+                if DEBUG:
+                    print("Counter attack missed!")
         else:
-            print("Counter attack missed - no target!")
+            if DEBUG:
+                print("Counter attack missed - no target!")
     
     def reset_counter_state(self):
         """Reset all counter-related states and return to idle"""
@@ -508,6 +626,9 @@ class Player(pygame.sprite.Sprite):
         self.frame = 0.0
 
     def handle_event(self, e):
+        # Only key presses and mouse buttons drive the player
+        if e.type not in _INPUT_EVENTS:
+            return
         # Don't handle events if dead or hurt
         if self.is_dead or self.state in ('hurt', 'death'):
             return
@@ -522,12 +643,14 @@ class Player(pygame.sprite.Sprite):
                 self.state = 'block'
                 self.frame = 0.0
                 self.dir = 0  # Stop movement when blocking starts
-                print("Player started blocking")
+                if DEBUG:
+                    print("Player started blocking")
         
         if e.type == pygame.MOUSEBUTTONUP and e.button == 3:  # Right mouse button released
             if self.blocking and self.block_animation_state in ('entering', 'holding'):
                 self.block_animation_state = 'exiting'
-                print("Player releasing block")
+                if DEBUG:
+                    print("Player releasing block")
 
         # ── handle jump input ──
         if e.type == pygame.KEYDOWN and e.key == pygame.K_SPACE:
@@ -581,14 +704,15 @@ class Player(pygame.sprite.Sprite):
                 self.last_skill_time_ms = now_ms
                 if self.sfx_skill:
                     self.sfx_skill.play()
-                print("Skill activated!")
+                if DEBUG:
+                    print("Skill activated!")
 
         # ── handle dash input ──
         if e.type == pygame.KEYDOWN and e.key == pygame.K_LSHIFT:
+            now = pygame.time.get_ticks()
             # Check if blocking and can counter
             if self.blocking and not self.countering:
                 # Anti-spam: prevent counter attempts too frequently
-                now = pygame.time.get_ticks()
                 if now - self.last_counter_time < 500:  # 500ms cooldown between counter attempts
                     return
                 
@@ -608,7 +732,7 @@ class Player(pygame.sprite.Sprite):
                 mouse_buttons = pygame.mouse.get_pressed()
                 if not mouse_buttons[2]:  # Right mouse button (index 2) is not pressed
                     self.dashing    = True
-                    self.dash_start = pygame.time.get_ticks()  # e.g. 123456 ms
+                    self.dash_start = now  # e.g. 123456 ms
                     self.state      = 'dash'
                     self.frame      = 0.0
                     if self.sfx_dash:
@@ -617,10 +741,9 @@ class Player(pygame.sprite.Sprite):
     def handle_input(self):
         # Don't handle input if dead, hurt, blocking, countering, counter attacking, or using skill
         # Allow input when counter_ready is true, even if countering
-        if (self.is_dead or self.state in ('hurt', 'death', 'skill') or 
+        if (self.is_dead or self.state in Player._ACTION_LOCKED or 
             (self.blocking and not self.counter_ready) or 
-            self.countering or self.counter_attacking or 
-            self.state in ('counter', 'counter_attack')):
+            self.countering or self.counter_attacking):
             return
         
         keys = pygame.key.get_pressed()
@@ -635,7 +758,8 @@ class Player(pygame.sprite.Sprite):
             self.state = 'block'
             self.frame = 0.0
             self.dir = 0
-            print("Block auto-started from held RMB")
+            if DEBUG:
+                print("Block auto-started from held RMB")
             return  # prevent walk/dir logic in same frame
 
         # Only update direction and facing if not attacking
@@ -665,362 +789,335 @@ class Player(pygame.sprite.Sprite):
             self.flip = (self.facing == -1)
 
 
-    def animate(self):
-        # pick the right sequence based on current state
-        seq = self.anims[self.state]
+    def _anim_block(self, seq):
+        """Block enter/hold/exit with eased speed"""
+        last = len(seq) - 1
+        if self.block_animation_state == 'entering':
+            # Play forward animation with ease-out
+            progress = self.frame / last if last > 0 else 1
+            # Simple ease-out: start fast, end slow
+            speed_multiplier = 1.5 - (progress * 0.8)  # 1.5 to 0.7
 
-        # Special handling for blocking animation
-        if self.state == 'block':
-            if self.block_animation_state == 'entering':
-                # Play forward animation with ease-out
-                progress = self.frame / (len(seq) - 1) if len(seq) > 1 else 1
-                # Simple ease-out: start fast, end slow
-                speed_multiplier = 1.5 - (progress * 0.8)  # 1.5 to 0.7
-                
-                self.frame += self.block_animation_speed * speed_multiplier
-                if self.frame >= len(seq) - 1:
-                    self.frame = len(seq) - 1  # Clamp to last frame
-                    self.block_animation_state = 'holding'
+            self.frame += self.block_animation_speed * speed_multiplier
+            if self.frame >= last:
+                self.frame = last  # Clamp to last frame
+                self.block_animation_state = 'holding'
+                if DEBUG:
                     print("Block animation complete - holding")
-            
-            elif self.block_animation_state == 'holding':
-                # Stay on last frame
-                self.frame = len(seq) - 1
-            
-            elif self.block_animation_state == 'exiting':
-                # Play reverse animation with ease-in
-                progress = (len(seq) - 1 - self.frame) / (len(seq) - 1) if len(seq) > 1 else 1
-                # Simple ease-in: start slow, end fast
-                speed_multiplier = 0.8 + (progress * 0.7)  # 0.8 to 1.5
-                
-                self.frame -= self.block_animation_speed * speed_multiplier
-                if self.frame <= 0:
-                    self.frame = 0.0
-                    self.blocking = False
-                    self.block_animation_state = 'none'
-                    self.state = 'idle'
+
+        elif self.block_animation_state == 'holding':
+            # Stay on last frame
+            self.frame = last
+
+        elif self.block_animation_state == 'exiting':
+            # Play reverse animation with ease-in
+            progress = (last - self.frame) / last if last > 0 else 1
+            # Simple ease-in: start slow, end fast
+            speed_multiplier = 0.8 + (progress * 0.7)  # 0.8 to 1.5
+
+            self.frame -= self.block_animation_speed * speed_multiplier
+            if self.frame <= 0:
+                self.frame = 0.0
+                self.blocking = False
+                self.block_animation_state = 'none'
+                self.state = 'idle'
+                if DEBUG:
                     print("Block animation finished - back to idle")
-            
-            img = seq[int(self.frame)]
-        
-        # Special handling for counter animations
-        elif self.state == 'counter':
-            # Play counter animation once
-            self.frame += 0.4  # Fast counter animation
-            
-            if self.frame >= len(seq) - 1:
-                # Counter animation finished
-                if self.counter_success:
-                    # Successful counter - stay in idle, waiting for click
-                    self.state = 'idle'  # Return to idle, waiting for click
-                    self.frame = 0.0
-                    self.countering = False  # Allow input handling
-                else:
-                    # Failed counter - return to blocking
-                    self.reset_counter_state()
-            img = seq[int(self.frame)]
-        
-        elif self.state == 'counter_attack':
-            seq = self.anims['counter_attack']
-            self.frame += 0.3
-            if not self._counter_damage_dealt and self.frame >= len(seq)*0.7:
-                self.perform_counter_attack_damage()
-                self._counter_damage_dealt = True
-            if self.frame >= len(seq)-1:
-                self.reset_counter_state()
-                self.last_attack_time = 0
-            img = seq[int(self.frame)]
 
-            
-        elif self.state == 'skill':
-            # play once
-            self.frame += 0.35
-            seq = self.anims['skill']
-            # damage at 50%
-            if not self._skill_damage_dealt and self.frame >= len(seq)*0.5:
-                self._skill_damage_dealt = True
-                damage = self.skill_damage
-                ui_system = getattr(self, 'ui_system', None)
-                if hasattr(self, 'all_enemies'):
-                    for enemy in self.all_enemies:
-                        # Use distance to center point for circular AOE
-                        dist = pygame.math.Vector2(self.rect.center).distance_to(enemy.rect.center)
-                        if dist <= self.skill_radius + enemy.rect.width/2:
-                            enemy.take_damage(damage, ui_system)
+        return seq[int(self.frame)]
+
+    def _anim_counter(self, seq):
+        """Counter stance, played once"""
+        # Play counter animation once
+        self.frame += 0.4  # Fast counter animation
+
+        if self.frame >= len(seq) - 1:
+            # Counter animation finished
+            if self.counter_success:
+                # Successful counter - stay in idle, waiting for click
+                self.state = 'idle'  # Return to idle, waiting for click
+                self.frame = 0.0
+                self.countering = False  # Allow input handling
+            else:
+                # Failed counter - return to blocking
+                self.reset_counter_state()
+        return seq[int(self.frame)]
+
+    def _anim_counter_attack(self, seq):
+        """Counter attack, deals its damage at 70%"""
+        seq = self.anims['counter_attack']
+        n = len(seq)
+        self.frame += 0.3
+        if not self._counter_damage_dealt and self.frame >= n*0.7:
+            self.perform_counter_attack_damage()
+            self._counter_damage_dealt = True
+        if self.frame >= n-1:
+            self.reset_counter_state()
+            self.last_attack_time = 0
+        return seq[int(self.frame)]
+
+    def _anim_skill(self, seq):
+        """Skill AOE, deals its damage at 50%"""
+        # play once
+        self.frame += 0.35
+        seq = self.anims['skill']
+        n = len(seq)
+        # damage at 50%
+        if not self._skill_damage_dealt and self.frame >= n*0.5:
+            self._skill_damage_dealt = True
+            damage = self.skill_damage
+            ui_system = self.ui_system
+            if self.all_enemies:
+                cx, cy = self.rect.center
+                skill_radius = self.skill_radius
+                for enemy in self.all_enemies:
+                    # Use distance to center point for circular AOE (squared, no sqrt)
+                    erect = enemy.rect
+                    ex, ey = erect.center
+                    dx, dy = cx - ex, cy - ey
+                    r = skill_radius + erect.width * 0.5
+                    if dx*dx + dy*dy <= r*r:
+                        enemy.take_damage(damage, ui_system)
+            if DEBUG:
                 print("Skill dealt damage")
-            if self.frame >= len(seq)-1:
+        if self.frame >= n-1:
+            self.state = 'idle'
+            self.frame = 0.0
+        return seq[int(self.frame)]
+
+    def _anim_default(self, seq):
+        """Looping / play-once animations with a per-state speed"""
+        n = len(seq)
+        # Normal animation logic for all other states
+        # choose frame-advance speed
+        if isinstance(self.state, int):
+            if self.state == 2:
+                speed = 0.1  # slower speed for attack 2
+            else:
+                speed = 0.3  # default speed for other attacks
+        elif self.state == 'walk_start':
+            speed = 0.9  # speed for walk start animation
+            if int(self.frame) == n - 1:
+                self.state = 'walk'
+                self.frame = 0.0
+        elif self.state == 'walk_stop':
+            speed = 0.9  # speed for walk stop animation
+        elif self.state == 'walk':
+            speed = 0.6  # speed for walking animation
+        elif self.state == 'dash':
+            speed = 0.3
+        elif self.state in ('jump','jump2'):
+            speed = 0.25
+        elif self.state == 'hurt':
+            speed = 0.2  # hurt animation speed
+        elif self.state == 'death':
+            speed = 0.3  # death animation speed
+        else:
+            speed = 0.2         # idle, default
+
+        # Advance the frame
+        self.frame = self.frame + speed
+
+        # For jump animations, freeze on the last frame instead of looping
+        if self.state in ('jump', 'jump2') and self.frame >= n:
+            self.frame = n - 1
+            # Check if we're grounded but still showing jump animation
+            if self.rigid_body.is_grounded:
+                # Force transition to idle if we're on the ground but still in jump animation
                 self.state = 'idle'
                 self.frame = 0.0
-            img = seq[int(self.frame)]
-            
-            # Deal damage at 70% of animation
-            if not hasattr(self, '_counter_damage_dealt'):
-                self._counter_damage_dealt = False
-            
-            if not self._counter_damage_dealt and self.frame >= len(seq) * 0.7:
-                self.perform_counter_attack_damage()
-                self._counter_damage_dealt = True
-            
-            if self.frame >= len(seq) - 1:
-                # Counter attack finished, reset counter state and attack sequence
-                self.reset_counter_state()  # This will handle state transition properly
-                # Reset attack sequence back to 1, 2, 3
-                self.last_attack_time = 0  # Reset attack timing to allow fresh sequence
-                print("Counter attack finished! Attack sequence reset to 1, 2, 3")
-            
-            img = seq[int(self.frame)]
-        
         else:
-            # Normal animation logic for all other states
-            # choose frame-advance speed
-            if isinstance(self.state, int):
-                if self.state == 2:
-                    speed = 0.1  # slower speed for attack 2
-                else:
-                    speed = 0.3  # default speed for other attacks
-            elif self.state == 'walk_start':
-                speed = 0.9  # speed for walk start animation
-                if int(self.frame) == len(seq) - 1:
-                    self.state = 'walk'
-                    self.frame = 0.0
-            elif self.state == 'walk_stop':
-                speed = 0.9  # speed for walk stop animation
-            elif self.state == 'walk':
-                speed = 0.6  # speed for walking animation
-            elif self.state == 'dash':
-                speed = 0.3
-            elif self.state in ('jump','jump2'):
-                speed = 0.25
-            elif self.state == 'hurt':
-                speed = 0.2  # hurt animation speed
-            elif self.state == 'death':
-                speed = 0.3  # death animation speed
-            else:
-                speed = 0.2         # idle, default
+            # For other animations, wrap around (a subtract covers the usual
+            # one-frame overshoot; modulo only after a big jump)
+            if self.frame >= n:
+                self.frame -= n
+                if self.frame >= n:
+                    self.frame %= n
 
-            # Advance the frame
-            self.frame = self.frame + speed
-            
-            # For jump animations, freeze on the last frame instead of looping
-            if self.state in ('jump', 'jump2') and self.frame >= len(seq):
-                self.frame = len(seq) - 1
-                # Check if we're grounded but still showing jump animation
-                if self.rigid_body.is_grounded:
-                    # Force transition to idle if we're on the ground but still in jump animation
-                    self.state = 'idle'
-                    self.frame = 0.0
-            else:
-                # For other animations, wrap around
-                self.frame = self.frame % len(seq)
-                
-            img = seq[int(self.frame)]
+        return seq[int(self.frame)]
 
-        # apply flip if facing left
+    def animate(self):
+        # pick the right sequence based on current state
+        seq = self.anims[self.state]
+
+        # states with their own frame logic; everything else (attacks, walk,
+        # jump, idle…) goes through _anim_default
+        if isinstance(self.state, int):
+            img = self._anim_default(seq)
+        else:
+            img = Player._ANIM_HANDLERS.get(self.state, Player._anim_default)(self, seq)
+
+        # apply flip if facing left (pre-flipped at load)
         if self.flip:
-            img = pygame.transform.flip(img, True, False)
+            img = _FLIPPED[img]
 
-        # set the sprite image & update rect to keep bottom alignment
+        # set the sprite image; every frame is PLAYER_SIZE, so the existing
+        # rect already keeps bottom alignment (no new Rect per frame)
         self.image = img
-        self.rect  = img.get_rect(midbottom=self.rect.midbottom)
 
         # ── walking sound loop management ──
-        if self.state == 'walk' and self.sfx_walk:
-            if not self._walk_sound_playing:
-                self.sfx_walk.play(loops=-1)
-                self._walk_sound_playing = True
-        else:
-            if self._walk_sound_playing and self.sfx_walk:
+        # only acts on the edge where "walking" and "loop playing" disagree
+        # (also picks the loop back up if main.py stopped it for a dialog)
+        if (self.state == 'walk') != self._walk_sound_playing and self.sfx_walk:
+            if self._walk_sound_playing:
                 self.sfx_walk.stop()
                 self._walk_sound_playing = False
+            else:
+                self._ch_walk.play(self.sfx_walk, loops=-1)
+                self._walk_sound_playing = True
 
-    def update(self):
-        now = pygame.time.get_ticks()  # current time in ms
-        # ── external knockback management (set by enemies) ──
-        if hasattr(self, 'knockback_end_time'):
-            # If player died during knock-back, abort knock-back handling and let death anim run
-            if self.is_dead:
-                delattr(self, 'knockback_end_time')
-            elif now < self.knockback_end_time:
-                # During knockback: keep block pose, no input or other actions
-                self.blocking = True
-                self.block_animation_state = 'holding'
-                self.state = 'block'
+    _ANIM_HANDLERS = {
+        'block': _anim_block,
+        'counter': _anim_counter,
+        'counter_attack': _anim_counter_attack,
+        'skill': _anim_skill,
+    }
+
+    def _update_knockback(self, now):
+        """External knock-back (set by enemies); True while it owns the frame"""
+        # If player died during knock-back, abort knock-back handling and let death anim run
+        if self.is_dead:
+            self.knockback_end_time = None
+        elif now < self.knockback_end_time:
+            # During knockback: keep block pose, no input or other actions
+            self.blocking = True
+            self.block_animation_state = 'holding'
+            self.state = 'block'
 
-                # Make sure physics treats the player as airborne during knock-back
-                # This avoids the stronger ground friction that would otherwise
-                # shorten the push-back distance on subsequent hits.
-                self.rigid_body.is_grounded = False
+            # Make sure physics treats the player as airborne during knock-back
+            # This avoids the stronger ground friction that would otherwise
+            # shorten the push-back distance on subsequent hits.
+            self.rigid_body.is_grounded = False
 
-                # Apply a consistent horizontal slow-down (air drag style)
-                self.rigid_body.velocity_x *= 0.95
+            # Apply a consistent horizontal slow-down (air drag style)
+            self.rigid_body.velocity_x *= 0.95
 
-                # ── update physics & sync sprite ──
-                self.rigid_body.update_physics()
-                rb_x, rb_y = self.rigid_body.get_position()
-                self.rect.centerx = int(rb_x)
-                self.rect.centery = int(rb_y)
-                self.world_x = self.rect.centerx
+            # ── update physics & sync sprite ──
+            self.rigid_body.update_physics()
+            col = self.rigid_body.collider
+            self.rect.centerx = int(col.center_x)
+            self.rect.centery = int(col.center_y)
+            self.world_x = self.rect.centerx
 
-                # Ensure correct block frame is shown during knock-back
-                self.animate()
-                return  # skip the rest until knockback finishes
-            else:
-                # Knockback finished – clean up once
-                delattr(self, 'knockback_end_time')
-                self.blocking = False
-                self.block_animation_state = 'none'
-                self.state = 'idle'
-                # stop residual velocity completely
-                self.rigid_body.velocity_x = 0
-                self.rigid_body.velocity_y = 0
-        
-        # Always check if we're on ground but still showing jump animation
-        # This needs to run EVERY frame, before any other logic
-        if self.rigid_body.is_grounded and self.state in ('jump', 'jump2'):
-            # Transition from jump to idle/walk when on ground
-            if self.dir != 0:
-                self.state = 'walk'
-            else:
-                self.state = 'idle'
+            # Ensure correct block frame is shown during knock-back
+            self.animate()
+            return True  # skip the rest until knockback finishes
+        else:
+            # Knockback finished – clean up once
+            self.knockback_end_time = None
+            self.blocking = False
+            self.block_animation_state = 'none'
+            self.state = 'idle'
+            # stop residual velocity completely
+            self.rigid_body.velocity_x = 0
+            self.rigid_body.velocity_y = 0
+        return False
+
+    def _update_dash(self, now):
+        """Move at DASH_SPEED for DASH_DURATION, then drop back to idle"""
+        finished = (now - self.dash_start) > DASH_DURATION
+        # Move by dash distance directly (like original code)
+        dx = DASH_SPEED * ( -1 if self.flip else 1 )
+        self.rect.x += dx  # Move sprite directly like original
+        # Keep rigid body synced with sprite
+        col = self.rigid_body.collider
+        col.center_x, col.center_y = self.rect.center
+        self.animate()
+        if finished:
+            self.dashing = False
+            # Clear any accumulated velocity from dash
+            self.rigid_body.velocity_x = 0
+            # Go to idle after dash
+            self.state = 'idle'
             self.frame = 0.0
+            # Reset jump counters on dash-landing so jumping works again
             self.jumps = 0
-            
-        self.handle_input()
-
-
-        # Handle hurt state
-        if self.state == 'hurt':
-            self.animate()
-            # When hurt animation ends, return to idle
-            if int(self.frame) >= len(self.anims['hurt']) - 1:
-                self.state = 'idle'
-                self.frame = 0.0
-            return  # Skip other updates while hurt
-        
-        # Handle death state
-        if self.state == 'death':
-            self.animate()
-            # Death animation plays once and stays on last frame
-            if int(self.frame) >= len(self.anims['death']) - 1:
-                self.frame = len(self.anims['death']) - 1  # Stay on last frame
-            return  # Skip all other updates when dead
-
-        # Update attack point position
-        self.update_attack_point()
-
-
-         # Check if the attack state should reset
-        if isinstance(self.state, int) and (now - self.last_attack_time > self.attack_delays.get(self.state, 0)):
-            if self.state < 3:
-                self.state += 1
-                self.last_attack_time = now  # Reset the attack timer for the next attack
-            else:
-                self.state = 'idle'
-                self.frame = 0.0
-
-        # ── DASH LOGIC ──
-        if self.dashing:
-            finished = (now - self.dash_start) > DASH_DURATION
-            # Move by dash distance directly (like original code)
-            dx = DASH_SPEED * ( -1 if self.flip else 1 )
-            self.rect.x += dx  # Move sprite directly like original
+            self.last_jump_time = 0
+
+    def _update_attack_lunge(self):
+        """Play the attack frame and ease the lunge forward (no gravity)"""
+        seq   = self.anims[self.state]
+        speed = 0.3
+        last  = len(seq) - 1
+        # advance until last frame
+        self.frame = min(self.frame + speed, last)
+        img = seq[int(self.frame)]
+        if self.flip:
+            img = _FLIPPED[img]
+        self.image = img  # same size as every frame, rect stays put
+
+        # compute progress 0→1 then eased distance
+        # (ease-out quad inlined: fast start, slow end, 1 - (1 - prog)^2)
+        rem   = 1 - self.frame / last
+        eased = 1 - rem * rem            # e.g. at prog=0.5, eased=0.75
+        target = ATTACK_DIST * eased     # e.g. 70 * 0.75 = 52.5 px
+        delta  = target - self._atk_covered
+        # Apply attack lunge by moving sprite directly (like original code)
+        if delta > 0:
+            self.rect.x += self.facing * delta
             # Keep rigid body synced with sprite
-            self.rigid_body.set_position(self.rect.centerx, self.rect.centery)
-            self.animate()
-            if finished:
-                self.dashing = False
-                # Clear any accumulated velocity from dash
-                self.rigid_body.velocity_x = 0
-                # Go to idle after dash
-                self.state = 'idle'
-                self.frame = 0.0
-                # Reset jump counters on dash-landing so jumping works again
-                self.jumps = 0
-                self.last_jump_time = 0
-            return  # skip the rest while dashing
-
-        # ── ATTACK LUNGE (ease-out) ──
-        if isinstance(self.state, int):
-            seq   = self.anims[self.state]
-            speed = 0.3
-            # advance until last frame
-            self.frame = min(self.frame + speed, len(seq) - 1)
-            img = seq[int(self.frame)]
-            if self.flip:
-                img = pygame.transform.flip(img, True, False)
-            self.image = img
-            self.rect  = img.get_rect(midbottom=self.rect.midbottom)
-
-            # compute progress 0→1 then eased distance
-            prog  = self.frame / (len(seq) - 1)
-            eased = ease_out_quad(prog)      # e.g. at prog=0.5, eased≈0.75
-            target = ATTACK_DIST * eased     # e.g. 70 * 0.75 = 52.5 px
-            delta  = target - self._atk_covered
-            # Apply attack lunge by moving sprite directly (like original code)
-            if delta > 0:
-                self.rect.x += self.facing * delta
-                # Keep rigid body synced with sprite
-                self.rigid_body.set_position(self.rect.centerx, self.rect.centery)
-            self._atk_covered = target
-
-            # when animation ends, reset to idle (or trigger queued skill)
-            if self.frame >= len(seq) - 1:
-                # End of attack – revert to idle state
-                self.state        = 'idle'
-                self.frame        = 0.0
-                self._atk_covered = 0.0
-                # Clear any accumulated velocity from attack and sync positions
-                self.rigid_body.velocity_x = 0
-                self.rigid_body.set_position(self.rect.centerx, self.rect.centery)
-
-            return  # skip movement & gravity during attack
-
-        # ── RIGID BODY PHYSICS ──
+            col = self.rigid_body.collider
+            col.center_x, col.center_y = self.rect.center
+        self._atk_covered = target
+
+        # when animation ends, reset to idle (or trigger queued skill)
+        if self.frame >= last:
+            # End of attack – revert to idle state
+            self.state        = 'idle'
+            self.frame        = 0.0
+            self._atk_covered = 0.0
+            # Clear any accumulated velocity from attack and sync positions
+            self.rigid_body.velocity_x = 0
+            col = self.rigid_body.collider
+            col.center_x, col.center_y = self.rect.center
+
+    def _update_physics(self):
+        """Walk velocity, rigid-body step, ground check and sprite sync"""
+        rb = self.rigid_body
         # Set horizontal velocity directly for walking (instead of applying forces)
         if not self.dashing:
             # Lock movement during counter states and skill
             if (self.countering or self.counter_attacking or 
                 self.state in ('counter', 'counter_attack', 'skill')):
-                self.rigid_body.velocity_x = 0  # Completely stop horizontal movement
+                rb.velocity_x = 0  # Completely stop horizontal movement
                 self.dir = 0  # Ensure direction is also locked
             elif self.dir != 0:
                 # Set horizontal velocity directly to match original movement speed
-                self.rigid_body.velocity_x = self.dir * MOVE_SPEED
+                rb.velocity_x = self.dir * MOVE_SPEED
             else:
                 # Apply friction when not moving
-                self.rigid_body.velocity_x *= 0.8
+                rb.velocity_x *= 0.8
             self.animate()
 
         # Update rigid body physics
-        self.rigid_body.update_physics()
+        rb.update_physics()
         
           # Check ground collision with rigid body only if ground_y is set
         if self.ground_y is not None:
-             self.rigid_body.check_ground_collision(self.ground_y)
+             rb.check_ground_collision(self.ground_y)
              # Track ground_y changes (without debug prints)
-             if not hasattr(self, '_prev_ground_y'):
-                 self._prev_ground_y = self.ground_y
              self._prev_ground_y = self.ground_y
         else:
             # If no ground is detected, make sure is_grounded is False to allow falling
             self.rigid_body.is_grounded = False
-            if hasattr(self, '_prev_ground_y'):
-                self._prev_ground_y = None
+            self._prev_ground_y = None
          
         
         # Sync sprite position with rigid body (only for normal movement)
         # During dash and attack, we move the sprite directly and sync rigid body to sprite
         if not self.dashing and not isinstance(self.state, int):
-            rb_center_x, rb_center_y = self.rigid_body.get_position()
-            self.rect.centerx = int(rb_center_x)
-            self.rect.centery = int(rb_center_y)
+            col = rb.collider
+            self.rect.centerx = int(col.center_x)
+            self.rect.centery = int(col.center_y)
         
         # Update world position (use centerx for more stable transitions)
         self.world_x = self.rect.centerx
 
+    def _update_air_state(self):
+        """Landing / falling / jump-frame bookkeeping after physics"""
         # Handle ground and air states
         # STEP 1: Determine if player just landed this frame
-        was_in_air = not hasattr(self, '_prev_grounded') or not self._prev_grounded
+        was_in_air = not self._prev_grounded
         just_landed = was_in_air and self.rigid_body.is_grounded
         
         # STEP 2: Handle landing
@@ -1059,7 +1156,7 @@ class Player(pygame.sprite.Sprite):
                 # Check velocity - if going down, show last frame
                 if self.rigid_body.velocity_y > 0:
                     # Going down - show last frame of jump animation
-                    target_frame = len(self.anims[self.state]) - 1
+                    target_frame = self.anims.last[self.state]
                     if int(self.frame) != target_frame:
                         self.frame = target_frame
         
@@ -1081,7 +1178,75 @@ class Player(pygame.sprite.Sprite):
         # Store current grounded state for next frame comparison
         self._prev_grounded = self.rigid_body.is_grounded
 
-    def click(self):
+    def update(self, now=None):
+        if now is None:
+            now = pygame.time.get_ticks()  # current time in ms
+        # ── external knockback management (set by enemies) ──
+        if self.knockback_end_time is not None and self._update_knockback(now):
+            return  # skip the rest until knockback finishes
+
+        # Always check if we're on ground but still showing jump animation
+        # This needs to run EVERY frame, before any other logic (main's tile
+        # pass can ground us between frames, and physics may clear it again
+        # before STEP 2 / STEP 4 get to look)
+        if self.rigid_body.is_grounded and self.state in ('jump', 'jump2'):
+            # Transition from jump to idle/walk when on ground
+            if self.dir != 0:
+                self.state = 'walk'
+            else:
+                self.state = 'idle'
+            self.frame = 0.0
+            self.jumps = 0
+            
+        self.handle_input()
+
+
+        # Handle hurt state
+        if self.state == 'hurt':
+            self.animate()
+            # When hurt animation ends, return to idle
+            if int(self.frame) >= self.anims.last['hurt']:
+                self.state = 'idle'
+                self.frame = 0.0
+            return  # Skip other updates while hurt
+        
+        # Handle death state
+        if self.state == 'death':
+            self.animate()
+            # Death animation plays once and stays on last frame
+            death_last = self.anims.last['death']
+            if int(self.frame) >= death_last:
+                self.frame = death_last  # Stay on last frame
+            return  # Skip all other updates when dead
+
+        # Update attack point position
+        self.update_attack_point()
+
+
+         # Check if the attack state should reset
+        if isinstance(self.state, int) and (now - self.last_attack_time > self.attack_delays.get(self.state, 0)):
+            if self.state < 3:
+                self.state += 1
+                self.last_attack_time = now  # Reset the attack timer for the next attack
+            else:
+                self.state = 'idle'
+                self.frame = 0.0
+
+        # ── DASH LOGIC ──
+        if self.dashing:
+            self._update_dash(now)
+            return  # skip the rest while dashing
+
+        # ── ATTACK LUNGE (ease-out) ──
+        if isinstance(self.state, int):
+            self._update_attack_lunge()
+            return  # skip movement & gravity during attack
+
+        # ── RIGID BODY PHYSICS ──
+        self._update_physics()
+        self._update_air_state()
+
+    def click(self, now=None):
         # Check if counter attack is ready first (highest priority)
         if self.counter_ready:
             # Execute counter attack
@@ -1095,7 +1260,8 @@ class Player(pygame.sprite.Sprite):
             self.state in ('counter', 'counter_attack')):
             return
 
-        now = pygame.time.get_ticks()  # current time in ms
+        if now is None:
+            now = pygame.time.get_ticks()  # current time in ms
 
         # ignore clicks mid-air
         if self.state in ('jump', 'jump2'):
@@ -1121,23 +1287,37 @@ class Player(pygame.sprite.Sprite):
 
         # Determine damage based on attack type
         if self.sfx_attack.get(self.state):
-            self.sfx_attack[self.state].play()
-        damage = {1: 20, 2: 40, 3: 60}.get(self.state, 0)
+            # a new swing cuts the previous one off instead of stacking
+            self._ch_attack.play(self.sfx_attack[self.state])
+        damage = ATTACK_DAMAGE.get(self.state, 0)
 
         # Check if the attack hits any enemies within range (AOE attack)
         hit_count = 0
-        ui_system = getattr(self, 'ui_system', None)
-        if hasattr(self, 'all_enemies') and self.all_enemies:
+        ui_system = self.ui_system
+        if self.all_enemies:
+            # check_attack_hit inlined with the per-swing values hoisted, so the
+            # loop is just arithmetic per enemy
+            ax, ay = self.attack_point
+            attack_radius = self.attack_radius
+            px, facing = self.rect.centerx, self.facing
             for enemy in self.all_enemies:
-                if self.check_attack_hit(enemy):
+                erect = enemy.rect
+                ex, ey = erect.center
+                if (ex > px) != (facing == 1):
+                    continue  # behind the player
+                dx, dy = ax - ex, ay - ey
+                r = attack_radius + erect.width * 0.5
+                if dx*dx + dy*dy <= r*r:
                     enemy.take_damage(damage, ui_system)
                     hit_count += 1
             if hit_count > 0:
-                print(f"Player hit {hit_count} enemy(ies) for {damage} damage each!")
+                if DEBUG:
+                    print(f"Player hit {hit_count} enemy(ies) for {damage} damage each!")
         elif self.target and self.check_attack_hit(self.target):
             # Fallback to single target if all_enemies is not available
             self.target.take_damage(damage, ui_system)
-            print(f"Player hit target for {damage} damage!")
+            if DEBUG:
+                print(f"Player hit target for {damage} damage!")
 
 
         # reset animation & lunge tracker
@@ -2,8 +2,59 @@
 import pygame
 import math
 
+
+def highest_tile_top(check_rect, tile_rects):
+    """Top of the highest tile overlapping check_rect, or None (ground scan done in C)"""
+    if isinstance(tile_rects, SpatialHash):
+        tile_rects = tile_rects.near(check_rect)
+    hits = check_rect.collidelistall(tile_rects)
+    if not hits:
+        return None
+    return min([tile_rects[i].top for i in hits])
+
+
+class SpatialHash(list):
+    """Tile rects bucketed into a uniform grid for broad-phase lookups.
+
+    Still a plain list of the rects (in their original order), so anything that
+    takes a tile list keeps working; near() hands back just the rects whose
+    cells touch a box. Built once per tile set – make a new one if tiles change.
+    """
+    def __init__(self, rects, cell_size=64):
+        super().__init__(rects)
+        self.cell_size = cell_size
+        self.buckets = {}
+        for i, r in enumerate(self):
+            if r.w <= 0 or r.h <= 0:
+                continue
+            for cx in range(r.left // cell_size, (r.right - 1) // cell_size + 1):
+                for cy in range(r.top // cell_size, (r.bottom - 1) // cell_size + 1):
+                    self.buckets.setdefault((cx, cy), []).append(i)
+
+    def near(self, rect):
+        """Rects sharing a cell with rect, in list order (a superset of the hits)"""
+        cs = self.cell_size
+        buckets = self.buckets
+        x0 = int(rect.left // cs)
+        x1 = int((rect.right - 1) // cs)
+        y0 = int(rect.top // cs)
+        y1 = int((rect.bottom - 1) // cs)
+        if x0 == x1 and y0 == y1:
+            return [self[i] for i in buckets.get((x0, y0), ())]
+        hits = set()
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                b = buckets.get((cx, cy))
+                if b:
+                    hits.update(b)
+        return [self[i] for i in sorted(hits)]
+
+
 class CircleCollider:
     """A circular collider for 2D physics"""
+    # Fixed slots: no per-instance dict, and faster centre reads/writes
+    __slots__ = ("center_x", "center_y", "radius")
+
     def __init__(self, center_x, center_y, radius):
         self.center_x = center_x
         self.center_y = center_y
@@ -22,38 +73,59 @@ class CircleCollider:
         """Check collision with another circle collider"""
         dx = self.center_x - other_collider.center_x
         dy = self.center_y - other_collider.center_y
-        distance = math.sqrt(dx * dx + dy * dy)
-        return distance < (self.radius + other_collider.radius)
+        r = self.radius + other_collider.radius
+        return dx * dx + dy * dy < r * r
     
     def collides_with_point(self, point_x, point_y):
         """Check if a point is inside this circle"""
         dx = self.center_x - point_x
         dy = self.center_y - point_y
-        distance = math.sqrt(dx * dx + dy * dy)
-        return distance <= self.radius
+        r = self.radius
+        return dx * dx + dy * dy <= r * r
     
     def collides_with_rect(self, rect):
         """Check collision with a pygame Rect (for tile collision)"""
         # Find the closest point on the rectangle to the circle center
-        closest_x = max(rect.left, min(self.center_x, rect.right))
-        closest_y = max(rect.top, min(self.center_y, rect.bottom))
-        
-        # Calculate distance from circle center to closest point
-        dx = self.center_x - closest_x
-        dy = self.center_y - closest_y
-        distance = math.sqrt(dx * dx + dy * dy)
+        # (plain compares instead of max/min builtins)
+        cx = self.center_x
+        cy = self.center_y
+        left = rect.left
+        right = rect.right
+        if cx < left:
+            closest_x = left
+        elif cx > right:
+            closest_x = right
+        else:
+            closest_x = cx
+        top = rect.top
+        bottom = rect.bottom
+        if cy < top:
+            closest_y = top
+        elif cy > bottom:
+            closest_y = bottom
+        else:
+            closest_y = cy
         
-        return distance <= self.radius
+        # Compare squared distance to the closest point (no sqrt needed)
+        dx = cx - closest_x
+        dy = cy - closest_y
+        r = self.radius
+        return dx * dx + dy * dy <= r * r
     
     def draw_debug(self, screen, cam_x, cam_y, color=(0, 255, 0), width=2):
-        """Draw the circle collider for debugging"""
-        screen_x = int(self.center_x - cam_x)
-        screen_y = int(self.center_y - cam_y)
-        pygame.draw.circle(screen, color, (screen_x, screen_y), int(self.radius), width)
+        """Draw the circle collider for debugging; returns the int screen centre"""
+        center = (int(self.center_x - cam_x), int(self.center_y - cam_y))
+        pygame.draw.circle(screen, color, center, int(self.radius), width)
+        return center
 
 
 class RigidBody:
     """A rigid body with physics properties and a circular collider"""
+    __slots__ = ("collider", "_mass", "inv_mass", "velocity_x", "velocity_y",
+                 "acceleration_x", "acceleration_y", "gravity", "friction",
+                 "air_resistance", "bounce", "is_grounded", "ground_y",
+                 "can_collide", "_aabb")
+
     def __init__(self, center_x, center_y, radius, mass=1.0):
         self.collider = CircleCollider(center_x, center_y, radius)
         self.mass = mass
@@ -76,16 +148,30 @@ class RigidBody:
         
         # Collision response
         self.can_collide = True
+        # Reused broad-phase box around the circle (see check_tile_collision)
+        self._aabb = pygame.Rect(0, 0, 0, 0)
+        
+    @property
+    def mass(self):
+        return self._mass
+
+    @mass.setter
+    def mass(self, mass):
+        # Keep 1/mass alongside it; 0 inverse mass = immovable (mass <= 0)
+        self._mass = mass
+        self.inv_mass = 1.0 / mass if mass > 0 else 0.0
         
     def apply_force(self, force_x, force_y):
         """Apply a force to the rigid body"""
-        self.acceleration_x += force_x / self.mass
-        self.acceleration_y += force_y / self.mass
+        inv_mass = self.inv_mass
+        self.acceleration_x += force_x * inv_mass
+        self.acceleration_y += force_y * inv_mass
     
     def apply_impulse(self, impulse_x, impulse_y):
         """Apply an instant impulse to the rigid body"""
-        self.velocity_x += impulse_x / self.mass
-        self.velocity_y += impulse_y / self.mass
+        inv_mass = self.inv_mass
+        self.velocity_x += impulse_x * inv_mass
+        self.velocity_y += impulse_y * inv_mass
     
     def set_position(self, center_x, center_y):
         """Set the rigid body position"""
@@ -97,27 +183,41 @@ class RigidBody:
     
     def update_physics(self, dt=1.0):
         """Update physics simulation"""
+        # Work on locals and write each attribute back once
+        grounded = self.is_grounded
+        ax = self.acceleration_x
+        ay = self.acceleration_y
+        vx = self.velocity_x
+        vy = self.velocity_y
+        # Resting body: nothing to integrate, just settle the leftover drift
+        if (grounded and ax == 0 and ay == 0
+                and -0.01 < vx < 0.01 and -0.01 < vy < 0.01):
+            self.velocity_x = 0.0
+            self.velocity_y = 0.0
+            return
         # Apply gravity if not grounded
-        if not self.is_grounded:
-            self.acceleration_y += self.gravity
+        if not grounded:
+            ay += self.gravity
         
         # Update velocity with acceleration
-        self.velocity_x += self.acceleration_x * dt
-        self.velocity_y += self.acceleration_y * dt
+        vx += ax * dt
+        vy += ay * dt
         
         # Apply air resistance
-        if not self.is_grounded:
-            self.velocity_x *= self.air_resistance
-            self.velocity_y *= self.air_resistance
+        if not grounded:
+            air = self.air_resistance
+            vx *= air
+            vy *= air
         else:
             # Apply ground friction
-            self.velocity_x *= self.friction
+            vx *= self.friction
+        self.velocity_x = vx
+        self.velocity_y = vy
         
         # Update position with velocity
-        new_x = self.collider.center_x + self.velocity_x * dt
-        new_y = self.collider.center_y + self.velocity_y * dt
-        
-        self.set_position(new_x, new_y)
+        collider = self.collider
+        collider.center_x += vx * dt
+        collider.center_y += vy * dt
         
         # Reset acceleration (forces are applied each frame)
         self.acceleration_x = 0.0
@@ -125,18 +225,15 @@ class RigidBody:
     
     def check_ground_collision(self, ground_y):
         """Check and resolve collision with ground"""
-        bottom_y = self.collider.center_y + self.collider.radius
-        
-        # Track ground state changes (without debug prints)
-        was_grounded = self.is_grounded
-        
         # Handle case where ground_y is None (no ground beneath)
         if ground_y is None:
             self.is_grounded = False
             self.ground_y = None
             return
             
-        if bottom_y >= ground_y:
+        collider = self.collider
+        radius = collider.radius
+        if collider.center_y + radius >= ground_y:
             # Collision with ground
             
             # Only set is_grounded true if coming down (not going up through ground)
@@ -145,8 +242,7 @@ class RigidBody:
                 self.ground_y = ground_y
                 
                 # Adjust position to sit on ground
-                new_center_y = ground_y - self.collider.radius
-                self.set_position(self.collider.center_x, new_center_y)
+                collider.center_y = ground_y - radius
                 
                 # Always stop vertical velocity when grounded
                 self.velocity_y = 0
@@ -160,26 +256,110 @@ class RigidBody:
         if not self.can_collide:
             return
         
-        for tile_rect in tile_rects:
-            if self.collider.collides_with_rect(tile_rect):
+        # Broad phase in C: only tiles overlapping the circle's bounding box
+        # (padded a pixel each side for int truncation) get the exact circle test
+        collider = self.collider
+        r = collider.radius
+        aabb = self._aabb
+        aabb.x = collider.center_x - r - 1
+        aabb.y = collider.center_y - r - 1
+        aabb.w = aabb.h = r + r + 3
+        if isinstance(tile_rects, SpatialHash):
+            tile_rects = tile_rects.near(aabb)
+        hits = aabb.collidelistall(tile_rects)
+        if not hits:
+            return
+        # Narrow phase: collides_with_rect inlined, re-reading the centre only
+        # after a resolve has moved it
+        cx = collider.center_x
+        cy = collider.center_y
+        r2 = r * r
+        for i in hits:
+            tile_rect = tile_rects[i]
+            left, top, right, bottom = tile_rect.left, tile_rect.top, tile_rect.right, tile_rect.bottom
+            dx = cx - (left if cx < left else right if cx > right else cx)
+            dy = cy - (top if cy < top else bottom if cy > bottom else cy)
+            if dx * dx + dy * dy <= r2:
                 self.resolve_tile_collision(tile_rect)
+                cx = collider.center_x
+                cy = collider.center_y
     
+    def resolve_and_ground(self, tile_rects, probe, wide_probe):
+        """check_tile_collision + a ground scan in one pass over the tiles.
+
+        probe / wide_probe are the entity's ground-check rects (see its
+        ground_probes()); returns the highest tile top under probe, falling back
+        to wide_probe, or None – same answer as check_tile_collision_below.
+        """
+        collider = self.collider
+        r = collider.radius
+        aabb = self._aabb
+        aabb.x = collider.center_x - r - 1
+        aabb.y = collider.center_y - r - 1
+        aabb.w = aabb.h = r + r + 3
+        can_collide = self.can_collide
+
+        ground = None
+        wide_ground = None
+        box = aabb.unionall((probe, wide_probe))
+        if isinstance(tile_rects, SpatialHash):
+            tile_rects = tile_rects.near(box)
+        r2 = r * r
+        for i in box.collidelistall(tile_rects):
+            tile_rect = tile_rects[i]
+            top = tile_rect.top
+            if can_collide and aabb.colliderect(tile_rect):
+                # Same inlined circle test as check_tile_collision
+                cx = collider.center_x
+                cy = collider.center_y
+                left, right, bottom = tile_rect.left, tile_rect.right, tile_rect.bottom
+                dx = cx - (left if cx < left else right if cx > right else cx)
+                dy = cy - (top if cy < top else bottom if cy > bottom else cy)
+                if dx * dx + dy * dy <= r2:
+                    self.resolve_tile_collision(tile_rect)
+            if probe.colliderect(tile_rect):
+                if ground is None or top < ground:
+                    ground = top
+            elif wide_probe.colliderect(tile_rect):
+                if wide_ground is None or top < wide_ground:
+                    wide_ground = top
+        return ground if ground is not None else wide_ground
+
     def resolve_tile_collision(self, tile_rect):
         """Resolve collision with a tile rectangle"""
         # Calculate overlap and push the circle out
-        center_x, center_y = self.collider.get_center()
-        radius = self.collider.radius
+        collider = self.collider
+        center_x = collider.center_x
+        center_y = collider.center_y
+        radius = collider.radius
         
         # Find the closest point on the rectangle
-        closest_x = max(tile_rect.left, min(center_x, tile_rect.right))
-        closest_y = max(tile_rect.top, min(center_y, tile_rect.bottom))
+        left = tile_rect.left
+        right = tile_rect.right
+        if center_x < left:
+            closest_x = left
+        elif center_x > right:
+            closest_x = right
+        else:
+            closest_x = center_x
+        top = tile_rect.top
+        bottom = tile_rect.bottom
+        if center_y < top:
+            closest_y = top
+        elif center_y > bottom:
+            closest_y = bottom
+        else:
+            closest_y = center_y
         
-        # Calculate penetration
+        # Calculate penetration (sqrt only once we know there is overlap)
         dx = center_x - closest_x
         dy = center_y - closest_y
-        distance = math.sqrt(dx * dx + dy * dy)
+        d2 = dx * dx + dy * dy
+        if d2 >= radius * radius or d2 == 0:
+            return
+        distance = math.sqrt(d2)
         
-        if distance < radius and distance > 0:
+        if distance < radius:
             # Normalize the collision vector
             nx = dx / distance
             ny = dy / distance
@@ -188,9 +368,8 @@ class RigidBody:
             penetration = radius - distance
             
             # Push the circle out
-            new_x = center_x + nx * penetration
-            new_y = center_y + ny * penetration
-            self.set_position(new_x, new_y)
+            collider.center_x = center_x + nx * penetration
+            collider.center_y = center_y + ny * penetration
             
             # Reflect velocity based on collision normal
             dot_product = self.velocity_x * nx + self.velocity_y * ny
@@ -207,14 +386,10 @@ class RigidBody:
     
     def draw_debug(self, screen, cam_x, cam_y, color=(0, 255, 0), width=2, show_velocity=False):
         """Draw debug information"""
-        self.collider.draw_debug(screen, cam_x, cam_y, color, width)
+        screen_x, screen_y = self.collider.draw_debug(screen, cam_x, cam_y, color, width)
         
-        # Draw velocity vector (optional)
+        # Draw velocity vector (optional, from the centre the circle used)
         if show_velocity:
-            center_x, center_y = self.collider.get_center()
-            screen_x = int(center_x - cam_x)
-            screen_y = int(center_y - cam_y)
-            
             vel_end_x = screen_x + int(self.velocity_x * 2)
             vel_end_y = screen_y + int(self.velocity_y * 2)
             
@@ -3,6 +3,22 @@ import pygame
 import time
 import os
 
+# ── Shared fonts ──
+# size → pygame Font, built on first request so importing this module before
+# pygame.init() is fine
+_FONT_CACHE = {}
+
+def _get_font(size):
+    f = _FONT_CACHE.get(size)
+    if f is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        f = _FONT_CACHE[size] = pygame.font.Font(None, size)
+    return f
+
+# Outline stamp positions for DamageText (ring of the 5×5 box at distance 2)
+_OUTLINE_OFFSETS = ((-2, -2), (0, -2), (2, -2), (-2, 0), (2, 0), (-2, 2), (0, 2), (2, 2))
+
 class DamageText:
     def __init__(self, x, y, damage, color=(255, 255, 255)):
         self.x = x
@@ -12,61 +28,91 @@ class DamageText:
         self.color = color
         self.start_time = time.time()
         self.duration = 1.0  # 1 second
-        self.font = pygame.font.Font(None, 40)  # Bigger font for better visibility
+        self._alpha = 255  # fade level, refreshed by update()
+        self.font = _get_font(40)  # Bigger font for better visibility
+        self._surface = self._render_text()
+
+    def _render_text(self):
+        """Text with its black outline baked into one surface (2px pad each side)"""
+        # Handle both numeric damage and text like "Blocked"
+        if isinstance(self.damage, (int, float)):
+            text_str = str(int(self.damage))
+        else:
+            text_str = str(self.damage)
+
+        outline = self.font.render(text_str, True, (0, 0, 0))
+        w, h = outline.get_size()
+        surf = pygame.Surface((w + 4, h + 4), pygame.SRCALPHA)
+        # 8 points of the 2px box – the glyph strokes are wider than the gaps
+        for dx, dy in _OUTLINE_OFFSETS:
+            surf.blit(outline, (2 + dx, 2 + dy))
+        surf.blit(self.font.render(text_str, True, self.color), (2, 2))
+        return surf
         
-    def update(self):
-        # Calculate elapsed time
-        elapsed = time.time() - self.start_time
+    def update(self, now=None):
+        # Calculate elapsed time (now can be passed in to share one clock read)
+        if now is None:
+            now = time.time()
+        elapsed = now - self.start_time
         if elapsed >= self.duration:
             return False  # Remove this damage text
             
         # Move text upward and fade out
         progress = elapsed / self.duration
         self.y = self.start_y - (progress * 80)  # Move up 80 pixels over duration
+        self._alpha = int(255 * (1 - progress))
+        self._surface.set_alpha(self._alpha)
         
         return True  # Keep this damage text
         
     def draw(self, screen, cam_x, cam_y):
-        # Calculate alpha for fade out
-        elapsed = time.time() - self.start_time
-        progress = elapsed / self.duration
-        alpha = int(255 * (1 - progress))
-        
-        # Create text surface with outline for better visibility
-        # Handle both numeric damage and text like "Blocked"
-        if isinstance(self.damage, (int, float)):
-            text_str = str(int(self.damage))
-        else:
-            text_str = str(self.damage)
-        
-        # Draw outline (black)
-        outline_color = (0, 0, 0)
-        for dx in [-2, -1, 0, 1, 2]:
-            for dy in [-2, -1, 0, 1, 2]:
-                if dx != 0 or dy != 0:
-                    outline_surface = self.font.render(text_str, True, outline_color)
-                    outline_surface.set_alpha(alpha)
-                    screen_x = self.x - cam_x + dx
-                    screen_y = self.y - cam_y + dy
-                    screen.blit(outline_surface, (screen_x, screen_y))
+        # Fade was already applied to the surface in update()
+        if self._alpha <= 0:
+            return
         
-        # Draw main text
-        text_surface = self.font.render(text_str, True, self.color)
-        text_surface.set_alpha(alpha)
-        screen_x = self.x - cam_x
-        screen_y = self.y - cam_y
-        screen.blit(text_surface, (screen_x, screen_y))
+        # Pre-rendered text + outline, faded as one surface
+        screen.blit(self._surface, (self.x - cam_x - 2, self.y - cam_y - 2))
 
 class HealthBar:
+    # (threshold, color): first threshold the health percent is above wins
+    _COLORS = ((0.6, (0, 255, 0)),    # Green
+               (0.3, (255, 255, 0)),  # Yellow
+               (0.0, (255, 0, 0)))    # Red
+
     def __init__(self, width=80, height=8):
         self.width = width
         self.height = height
-        self.font = pygame.font.Font(None, 24)
+        self.font = _get_font(24)
+        # (current, max) → "cur/max" label already on its translucent background
+        self._text_cache = {}
+
+    def _health_label(self, current, maximum):
+        """Cached label surface for integer health values"""
+        key = (current, maximum)
+        surf = self._text_cache.get(key)
+        if surf is None:
+            if len(self._text_cache) > 128:
+                self._text_cache.clear()
+            text_surface = self.font.render(f"{current}/{maximum}", True, (255, 255, 255))
+            w, h = text_surface.get_size()
+            # Half-transparent text background for better visibility
+            # (2px / 1px padding) – draw.rect used to ignore the alpha here
+            surf = pygame.Surface((w + 4, h + 2), pygame.SRCALPHA)
+            surf.fill((0, 0, 0, 128))
+            surf.blit(text_surface, (2, 1))
+            surf = self._text_cache[key] = surf.convert_alpha()
+        return surf
         
     def draw(self, screen, x, y, current_health, max_health, cam_x, cam_y):
         # Calculate screen position
         screen_x = x - cam_x - self.width // 2
         screen_y = y - cam_y - 40  # Position above the entity
+
+        # Offscreen? (40px slack covers the label sticking out above/sideways)
+        scr_w, scr_h = screen.get_size()
+        if (screen_x + self.width + 40 < 0 or screen_x - 40 > scr_w
+                or screen_y + self.height < 0 or screen_y - 40 > scr_h):
+            return
         
         # Calculate health percentage
         health_percent = max(0, current_health / max_health) if max_health > 0 else 0
@@ -76,33 +122,23 @@ class HealthBar:
         pygame.draw.rect(screen, (100, 0, 0), bg_rect)
         
         # Health bar (green to red gradient based on health)
-        if health_percent > 0:
-            health_width = int(self.width * health_percent)
+        health_width = int(self.width * health_percent)
+        if health_width > 0:
             health_rect = pygame.Rect(screen_x, screen_y, health_width, self.height)
             
             # Color gradient: green when full, yellow at 50%, red when low
-            if health_percent > 0.6:
-                color = (0, 255, 0)  # Green
-            elif health_percent > 0.3:
-                color = (255, 255, 0)  # Yellow
-            else:
-                color = (255, 0, 0)  # Red
+            for threshold, color in self._COLORS:
+                if health_percent > threshold:
+                    break
                 
             pygame.draw.rect(screen, color, health_rect)
         
         # Border
         pygame.draw.rect(screen, (255, 255, 255), bg_rect, 1)
         
-        # Health text
-        health_text = f"{int(current_health)}/{int(max_health)}"
-        text_surface = self.font.render(health_text, True, (255, 255, 255))
-        text_rect = text_surface.get_rect(center=(screen_x + self.width // 2, screen_y - 15))
-        
-        # Draw text background for better visibility
-        text_bg = pygame.Rect(text_rect.x - 2, text_rect.y - 1, text_rect.width + 4, text_rect.height + 2)
-        pygame.draw.rect(screen, (0, 0, 0, 128), text_bg)
-        
-        screen.blit(text_surface, text_rect)
+        # Health text (label + background, rendered once per value)
+        label = self._health_label(int(current_health), int(max_health))
+        screen.blit(label, label.get_rect(center=(screen_x + self.width // 2, screen_y - 15)))
 
 class UISystem:
     def __init__(self):
@@ -122,6 +158,9 @@ class UISystem:
             if pygame.display.get_surface():
                 raw_icon = raw_icon.convert_alpha()
             self.skill_icon = pygame.transform.smoothscale(raw_icon, (80, 80))
+            # Full-size cooldown overlay, blitted partially (see draw_skill_cooldown)
+            self._cd_overlay = pygame.Surface(self.skill_icon.get_size(), pygame.SRCALPHA)
+            self._cd_overlay.fill((30, 30, 30, 180))  # semi-transparent grey
                     
     def add_damage_text(self, x, y, damage, color=(255, 50, 50)):
         """Add a new damage text at the specified world coordinates"""
@@ -129,12 +168,19 @@ class UISystem:
         
     def update(self):
         """Update all UI elements and remove expired ones"""
-        self.damage_texts = [dt for dt in self.damage_texts if dt.update()]
+        if not self.damage_texts:
+            return
+        now = time.time()
+        self.damage_texts = [dt for dt in self.damage_texts if dt.update(now)]
         
     def draw_damage_texts(self, screen, cam_x, cam_y):
         """Draw all active damage texts"""
-        for dt in self.damage_texts:
-            dt.draw(screen, cam_x, cam_y)
+        # Each text's surface already carries its fade (set in update), so the
+        # whole lot goes to SDL in one blits() call (same as DamageText.draw each)
+        seq = [(dt._surface, (dt.x - cam_x - 2, dt.y - cam_y - 2))
+               for dt in self.damage_texts if dt._alpha > 0]
+        if seq:
+            screen.blits(seq, False)
             
     def draw_entity_health(self, screen, entity, cam_x, cam_y):
         """Draw health bar above an entity"""
@@ -165,8 +211,6 @@ class UISystem:
             self._damage_flash_end = now_t + 1.0  # 1 second yellow flash
         self._prev_player_health = player.current_health
 
-        font = pygame.font.Font(None, 36)
-
         # ------ lazy-load icon and dimensions ------
         if not hasattr(self, "_player_icon"):
             # Search common locations for player icon
@@ -260,9 +304,8 @@ class UISystem:
             # Skill still recharging – draw grey overlay covering (1-t) of height.
             overlay_h = int(icon_h * (1 - t))
             if overlay_h > 0:
-                overlay = pygame.Surface((icon_w, overlay_h), pygame.SRCALPHA)
-                overlay.fill((30, 30, 30, 180))  # semi-transparent grey
-                screen.blit(overlay, (x, y + (icon_h - overlay_h)))
+                # Only the top overlay_h rows of the pre-filled overlay
+                screen.blit(self._cd_overlay, (x, y + (icon_h - overlay_h)), (0, 0, icon_w, overlay_h))
 
         # Optional outline circle for clarity
         pygame.draw.circle(screen, (255, 255, 255), (x + icon_w // 2, y + icon_h // 2), icon_w // 2, 2)
\ No newline at end of file